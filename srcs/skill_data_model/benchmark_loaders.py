@@ -0,0 +1,196 @@
+"""
+Time and memory-profile every ingest loader (main.INGEST_TASKS).
+
+Runs against the synthetic inputs from synthetic_data.py (generated on the
+first run for a scale) or against any directory with --data-dir:
+
+    python3 benchmark_loaders.py --scale 10
+    python3 benchmark_loaders.py --scale 10 --compare output/benchmarks/<older run>.json
+
+Each loader is timed --repeat times (the best run counts), then run once
+more under tracemalloc for its peak Python heap allocation. Results are
+written as JSON to output/benchmarks/, and --compare prints the change
+against an earlier result file, flagging loaders that got slower by more
+than --tolerance (exit status 1 if any did).
+
+The Excel Parquet cache is disabled unless --cache is given, so the xlsx
+loaders are measured parsing their files.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# config (and with it the loaders) is imported only after SKILL_DATA_DIR is
+# set in main(), since DATA_DIR is read at import time
+_OUTPUT_DIR = Path(__file__).resolve().parent / "output"
+BENCHMARK_DIR = _OUTPUT_DIR / "benchmarks"
+SYNTHETIC_DIR = _OUTPUT_DIR / "synthetic"
+
+
+def _row_count(result) -> int:
+    """
+    Rows returned by a loader (some return a tuple of DataFrames).
+    """
+    if isinstance(result, pd.DataFrame):
+        return len(result)
+    return sum(len(df) for df in result)
+
+
+def benchmark_loaders(task_names=None, repeat: int = 3, compact: bool = False) -> dict:
+    """
+    Benchmark INGEST_TASKS in this process; returns task name ->
+    {"seconds", "peak_mb", "rows"}. DATA_DIR must already point at the
+    input files (SKILL_DATA_DIR is read when config is first imported).
+    """
+    from main import INGEST_TASKS
+
+    results = {}
+    for name, (loader, args) in INGEST_TASKS.items():
+        if task_names and name not in task_names:
+            continue
+        timings = []
+        # Loaders report VarPole statistics; keep the benchmark output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = loader(*args, compact=compact)
+                timings.append(time.perf_counter() - start)
+            rows = _row_count(result)
+            del result
+
+            tracemalloc.start()
+            loader(*args, compact=compact)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        results[name] = {
+            "seconds": round(min(timings), 4),
+            "peak_mb": round(peak / 1024**2, 2),
+            "rows": rows,
+        }
+        print(f"{name:32s} {min(timings):9.3f} s {peak / 1024**2:10.1f} MB {rows:>10} rows")
+    return results
+
+
+def compare_results(
+    previous: dict, current: dict, tolerance: float = 1.2, min_seconds: float = 0.05
+) -> list:
+    """
+    Print time / memory ratios current vs. previous and return the names of
+    loaders whose time grew by more than tolerance (a ratio). Loaders faster
+    than min_seconds in both runs are too noisy to count as regressions.
+    """
+    regressions = []
+    print(f"\n{'loader':32s} {'time':>8s} {'memory':>8s}")
+    for name, now in current.items():
+        before = previous.get(name)
+        if before is None:
+            print(f"{name:32s} {'new':>8s}")
+            continue
+        time_ratio = now["seconds"] / before["seconds"] if before["seconds"] else float("inf")
+        memory_ratio = now["peak_mb"] / before["peak_mb"] if before["peak_mb"] else float("inf")
+        flag = ""
+        if time_ratio > tolerance and now["seconds"] >= min_seconds:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:32s} {time_ratio:7.2f}x {memory_ratio:7.2f}x{flag}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ingest loaders.")
+    parser.add_argument(
+        "--scale",
+        type=int,
+        default=1,
+        help="Synthetic data scale (see synthetic_data.py); generated if missing.",
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=None,
+        help="Benchmark the input files in this directory instead of synthetic data.",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per loader.")
+    parser.add_argument("--compact", action="store_true", help="Benchmark with compact dtypes.")
+    parser.add_argument("--cache", action="store_true", help="Keep the Excel Parquet cache enabled.")
+    parser.add_argument("--only", nargs="+", metavar="TASK", help="Only these ingest tasks.")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Result file (default: output/benchmarks/loaders_x<scale>_<timestamp>.json).",
+    )
+    parser.add_argument("--compare", type=Path, default=None, help="Earlier result file.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.2,
+        help="Slow-down ratio reported as a regression by --compare.",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.05,
+        help="Ignore slow-downs of loaders that take less than this.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    data_dir = args.data_dir or SYNTHETIC_DIR / f"x{args.scale}"
+    os.environ["SKILL_DATA_DIR"] = str(data_dir.resolve())
+    if not args.cache:
+        os.environ["EXCEL_CACHE"] = "0"
+
+    if args.data_dir is None and not data_dir.exists():
+        from synthetic_data import generate
+
+        print(f"Generating synthetic data (scale {args.scale}) in {data_dir} ...")
+        generate(data_dir, scale=args.scale)
+
+    results = benchmark_loaders(args.only, repeat=args.repeat, compact=args.compact)
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "data_dir": str(data_dir),
+        "scale": None if args.data_dir else args.scale,
+        "repeat": args.repeat,
+        "compact": args.compact,
+        "cache": args.cache,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "results": results,
+    }
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = BENCHMARK_DIR / f"loaders_x{report['scale'] or 'custom'}_{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\nSaved benchmark results to {output.resolve()}")
+
+    if args.compare is not None:
+        previous = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare_results(
+            previous["results"], results, args.tolerance, args.min_seconds
+        )
+        if regressions:
+            print(f"\nSlower than {args.compare.name}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
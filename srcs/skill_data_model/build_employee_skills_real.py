@@ -1,65 +1,100 @@
+import argparse
+import hashlib
 import json
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
+import instrumentation
 from config import OUTPUT_DIR
+from instrumentation import stage
+from employee_skills_io import EMPLOYEE_SKILLS_FORMATS, write_employee_skills
+from keyword_matcher import KeywordMatcher
+from skill_matrix import (
+    LEVELS,
+    InvertedSkillIndex,
+    SkillMatrix,
+    inverted_index_path,
+    saved_skill_matrix,
+    skill_matrix_path,
+    source_stamp,
+)
+from table_io import find_table, read_table, write_table
 
+DEFAULT_OUTPUT_PATH = Path("employee_skills.json")
 
-def infer_level_from_count(n: int) -> str:
-    """
-    Simple heuristic to convert course count to skill level.
-    Adjust thresholds as needed.
-    """
-    if n >= 3:
-        return "Advanced"
-    elif n == 2:
-        return "Practitioner"
-    elif n == 1:
-        return "Beginner"
-    else:
-        return "None"
+# Course / keyword counts and high-water marks for --incremental
+STATE_DIR = OUTPUT_DIR / "employee_skills_state"
+STATE_FILE = "state.json"
+STATE_VERSION = 2
+COURSE_COUNTS_TABLE = "course_counts"
+KEYWORD_COUNTS_TABLE = "keyword_counts"
+LEVELS_TABLE = "skill_levels"
+# Columns whose values decide the counts; an edit to one of them in an
+# already counted row forces a recount
+_TRAINING_HASH_COLUMNS = ["person_id", "event_type_id", "start_date"]
+_DEGREED_HASH_COLUMNS = ["person_id", "content_title", "completed_date"]
 
+# Default --profile report
+DEFAULT_PROFILE_PATH = OUTPUT_DIR / "profile_build_employee_skills.json"
 
-def build_employee_skills():
-    # Paths to CSVs produced by main.py
-    training_participation_path = OUTPUT_DIR / "training_participation.csv"
-    training_events_path = OUTPUT_DIR / "training_events.csv"
-    skill_mapping_path = OUTPUT_DIR / "skill_mapping.csv"
-    degreed_learning_path = OUTPUT_DIR / "degreed_learning.csv"
 
-    if not training_participation_path.exists() or not training_events_path.exists():
-        raise FileNotFoundError(
-            "training_participation.csv or training_events.csv not found. "
-            "Run main.py first to generate output CSVs."
-        )
+# Skill levels (skill_matrix.LEVELS, lowest first); the best level of a skill wins
+LEVEL_DTYPE = pd.CategoricalDtype(LEVELS, ordered=True)
 
-    if not skill_mapping_path.exists():
-        raise FileNotFoundError(
-            "skill_mapping.csv not found. Run main.py first to generate output CSVs."
-        )
+# Count thresholds per source: (upper count bound, level) pairs, lowest first.
+# Adjust as needed.
+#   SAP courses:  1 -> Beginner, 2 -> Practitioner, 3+ -> Advanced
+#   Degreed:    1-2 -> Beginner, 3-4 -> Practitioner, 5+ -> Advanced
+SAP_COUNT_LEVELS = [(0, "None"), (1, "Beginner"), (2, "Practitioner"), (float("inf"), "Advanced")]
+DEGREED_COUNT_LEVELS = [(0, "None"), (2, "Beginner"), (4, "Practitioner"), (float("inf"), "Advanced")]
+
+
+# Degreed content title keyword -> skill_name (adjust to your needs), with
+# the keyword_matcher boundary rule: None = anywhere in the title,
+# "start" = at the start of a word, "word" = whole word only
+DEGREED_KEYWORDS = [
+    ("python", "Python", None),
+    ("mlops", "MLOps", None),
+    ("machine learning", "Machine Learning", None),
+    ("data quality", "Data Quality", None),
+    ("sql", "SQL", None),
+    ("ci/cd", "CI/CD", "word"),
+    ("git", "Version Control", "start"),
+]
+DEGREED_MATCHER = KeywordMatcher(
+    [keyword for keyword, _, _ in DEGREED_KEYWORDS],
+    [boundary for _, _, boundary in DEGREED_KEYWORDS],
+)
+
+
+def levels_from_counts(counts: pd.Series, count_levels) -> pd.Series:
+    """
+    Convert counts to skill levels (LEVEL_DTYPE) by binning them with the
+    (upper bound, level) pairs of count_levels.
+    """
+    bounds = [-float("inf")] + [bound for bound, _ in count_levels]
+    labels = [level for _, level in count_levels]
+    return pd.cut(counts, bins=bounds, labels=labels, ordered=False).astype(LEVEL_DTYPE)
 
-    # Load data
-    training_participation = pd.read_csv(
-        training_participation_path,
-        dtype=str,
-        parse_dates=["start_date", "end_date"],
-    )
-    training_events = pd.read_csv(training_events_path, dtype=str)
-    skill_mapping = pd.read_csv(skill_mapping_path, dtype=str)
 
+def _course_skill_rows(training_participation: pd.DataFrame, skill_mapping: pd.DataFrame):
+    """
+    Participation rows whose course maps to a skill: person_id, skill_name.
+    """
     # Clean up columns
-    for df in (training_participation, training_events, skill_mapping):
+    for df in (training_participation, skill_mapping):
         df.columns = [c.strip() for c in df.columns]
 
-    # skill_mapping: course_code -> skill_name
-    # These are the columns we defined in the updated load_skill_mapping()
-    skill_mapping["skill_name"] = skill_mapping["skill_name"].fillna("").str.strip()
-    skill_mapping["course_code"] = skill_mapping["course_code"].fillna("").str.strip()
-    skill_mapping = skill_mapping[skill_mapping["skill_name"] != ""].copy()
+    # person_id may come back as integer / categorical from a columnar table
+    # written with main.py --compact; the skill dict is keyed by the string ID
+    training_participation["person_id"] = training_participation["person_id"].astype("string")
 
-    # Assumption: event_type_id (Typ akce) == course_code (Zkratka D / course_code)
-    course_to_skill = skill_mapping.set_index("course_code")["skill_name"]
+    # skill_mapping: course_code -> skill_name
+    course_to_skill = _course_to_skill(skill_mapping)
 
     # Attach skill_name to participation via event_type_id
     training_participation["event_type_id"] = (
@@ -70,120 +105,561 @@ def build_employee_skills():
     )
 
     # Keep only rows where we have a mapped skill_name
-    training_participation_skills = training_participation.dropna(
-        subset=["skill_name"]
-    ).copy()
-
-    # Count occurrences per person_id and skill_name
-    counts = (
-        training_participation_skills.groupby(["person_id", "skill_name"])
-        .size()
-        .reset_index(name="course_count")
-    )
+    return training_participation.dropna(subset=["skill_name"])[["person_id", "skill_name"]]
+
 
-    # Convert counts to levels
+def _course_to_skill(skill_mapping: pd.DataFrame) -> pd.Series:
+    """
+    course_code -> skill_name from the skill_mapping table.
+    """
+    skill_mapping = skill_mapping.copy()
+    skill_mapping.columns = [c.strip() for c in skill_mapping.columns]
+    # These are the columns we defined in the updated load_skill_mapping()
+    # Columnar tables may hold categoricals (main.py --compact) and keep the
+    # "nan" text that read_csv would have turned back into a missing value
+    for col in ["skill_name", "course_code"]:
+        skill_mapping[col] = (
+            skill_mapping[col]
+            .astype("string")
+            .replace("nan", pd.NA)
+            .fillna("")
+            .str.strip()
+        )
+    skill_mapping = skill_mapping[skill_mapping["skill_name"] != ""]
+
+    # Assumption: event_type_id (Typ akce) == course_code (Zkratka D / course_code)
+    return skill_mapping.set_index("course_code")["skill_name"]
+
+
+def course_counts(rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Number of courses per person_id and skill_name (sorted by both).
+    """
+    counts = rows.groupby(["person_id", "skill_name"]).size().reset_index(name="course_count")
     counts["course_count"] = counts["course_count"].astype(int)
-    counts["level"] = counts["course_count"].apply(infer_level_from_count)
+    return counts
 
-    # Optionally incorporate Degreed to bump some skills based on keywords
-    degreed_skills = None
-    if degreed_learning_path.exists():
-        degreed = pd.read_csv(
-            degreed_learning_path, dtype=str, parse_dates=["completed_date"]
+
+def _degreed_rows(degreed: pd.DataFrame):
+    """
+    Degreed completions with person_id and lower-cased content_title, or
+    None if the table lacks those columns.
+    """
+    degreed.columns = [c.strip() for c in degreed.columns]
+
+    # Make sure we have the expected columns
+    expected_cols = {"person_id", "content_title"}
+    missing = expected_cols - set(degreed.columns)
+    if missing:
+        print(
+            f"Warning: degreed_learning is missing columns {missing}; "
+            f"skipping Degreed-based skill inference."
         )
-        degreed.columns = [c.strip() for c in degreed.columns]
-
-        # Make sure we have the expected columns
-        expected_cols = {"person_id", "content_title"}
-        missing = expected_cols - set(degreed.columns)
-        if missing:
-            print(
-                f"Warning: degreed_learning.csv is missing columns {missing}; "
-                f"skipping Degreed-based skill inference."
+        return None
+
+    degreed["person_id"] = degreed["person_id"].astype(str).str.strip()
+    degreed["content_title"] = degreed["content_title"].astype(str).str.lower()
+    return degreed
+
+
+def keyword_counts(degreed: pd.DataFrame) -> pd.DataFrame:
+    """
+    Number of completions per DEGREED_KEYWORDS index and person_id whose
+    title matched the keyword (sorted by both).
+    """
+    # Match each distinct title once, then count per person how many
+    # completions matched each keyword
+    title_codes, titles = pd.factorize(degreed["content_title"])
+    matched = DEGREED_MATCHER.match_many(titles)
+    title_keywords = pd.DataFrame(
+        {
+            "title_code": np.repeat(np.arange(len(titles)), [len(m) for m in matched]),
+            "keyword": np.array([index for m in matched for index in m], dtype=np.int64),
+        }
+    )
+    hits = pd.DataFrame(
+        {"title_code": title_codes, "person_id": degreed["person_id"].to_numpy()}
+    ).merge(title_keywords, on="title_code")
+    counts = hits.groupby(["keyword", "person_id"]).size().reset_index(name="cnt")
+    counts["cnt"] = counts["cnt"].astype(int)
+    return counts
+
+
+def skill_levels(course_counts: pd.DataFrame, keyword_counts: pd.DataFrame) -> pd.Series:
+    """
+    Best level per (person_id, skill_name) over both sources.
+
+    Groups keep the order of their first row (SAP courses by person and
+    skill, then Degreed by keyword and person), which fixes the order of
+    employees and of their skills in the output.
+    """
+    sap = course_counts[["person_id", "skill_name"]].copy()
+    sap["level"] = levels_from_counts(course_counts["course_count"], SAP_COUNT_LEVELS)
+
+    degreed = keyword_counts[["person_id"]].copy()
+    degreed["skill_name"] = [DEGREED_KEYWORDS[k][1] for k in keyword_counts["keyword"]]
+    degreed["level"] = levels_from_counts(keyword_counts["cnt"], DEGREED_COUNT_LEVELS)
+
+    levels = pd.concat([sap, degreed], ignore_index=True)
+    levels["person_id"] = levels["person_id"].astype(str)
+    levels["skill_name"] = levels["skill_name"].astype(str)
+
+    # "None" is no skill at all
+    levels = levels[levels["level"] > "None"]
+    return levels.groupby(["person_id", "skill_name"], sort=False)["level"].max()
+
+
+def build_employee_skills(
+    output_path: Path = DEFAULT_OUTPUT_PATH, incremental: bool = False, workers: int = 1
+):
+    """
+    Infer employee skill levels from SAP course participation and Degreed
+    completions and write them to output_path (.json, .jsonl or .jsonl.gz,
+    see employee_skills_io).
+
+    The course and keyword counts and the resulting levels are kept in
+    STATE_DIR. With incremental=True, a table whose file did not change
+    since the previous run is not read at all; of a changed one only the
+    rows dated after the previous run's high-water mark are counted and
+    added to the stored counts, and only the employees with new rows get
+    their levels recomputed and patched into the stored levels. If the
+    skill mapping or keywords changed, or the rows at or before the
+    high-water mark are not the ones counted last time (compared by hash),
+    everything is recounted. The output is the same as without
+    incremental.
+
+    With workers > 1 the rows are split into that many shards by person_id
+    and counted in a process pool; the output is identical to workers=1.
+    """
+    # skill_mapping is small and decides whether the stored counts are valid
+    with stage("read_skill_mapping") as s:
+        skill_mapping = read_table("skill_mapping")
+        s.rows_out = len(skill_mapping)
+
+    rules = _rules_fingerprint(_course_to_skill(skill_mapping))
+    state = load_state() if incremental else None
+    if state is not None and state.get("rules") != rules:
+        print("Skill mapping or keywords changed; recounting all rows.")
+        state = None
+    has_degreed = find_table("degreed_learning")[0] is not None
+    if state is not None and (state.get("degreed") is not None) != has_degreed:
+        print("degreed_learning appeared or disappeared; recounting all rows.")
+        state = None
+    new_state = {"version": STATE_VERSION, "rules": rules}
+
+    # Load tables produced by main.py (CSV, Parquet or Feather, whichever
+    # was written last); read_table raises FileNotFoundError if one is missing
+    with stage("select_rows") as s:
+        training_rows, previous_counts, new_state["training"] = _new_rows(
+            "training_participation", "start_date", _TRAINING_HASH_COLUMNS, state, "training",
+            COURSE_COUNTS_TABLE,
+        )
+        degreed_rows, previous_kw_counts, new_state["degreed"] = None, None, None
+        if has_degreed:
+            degreed_rows, previous_kw_counts, new_state["degreed"] = _new_rows(
+                "degreed_learning", "completed_date", _DEGREED_HASH_COLUMNS, state, "degreed",
+                KEYWORD_COUNTS_TABLE,
             )
+            degreed_rows = _degreed_rows(degreed_rows)
+        s.rows_out = len(training_rows) + (len(degreed_rows) if degreed_rows is not None else 0)
+
+    if workers <= 1:
+        delta_counts, delta_kw_counts = count_skills(training_rows, skill_mapping, degreed_rows)
+    else:
+        delta_counts, delta_kw_counts = _count_skills_sharded(
+            training_rows, skill_mapping, degreed_rows, workers
+        )
+    counts = _add_counts(previous_counts, delta_counts, ["person_id", "skill_name"], "course_count")
+    kw_counts = _add_counts(previous_kw_counts, delta_kw_counts, ["keyword", "person_id"], "cnt")
+
+    # Employees whose counts changed; None = everyone (nothing stored to patch)
+    previous_levels = None
+    if previous_counts is not None and (previous_kw_counts is not None or not has_degreed):
+        previous_levels = read_table(LEVELS_TABLE, STATE_DIR)
+    with stage("merge_levels", rows_in=len(counts) + len(kw_counts)) as s:
+        if previous_levels is None:
+            levels = employee_levels(counts, kw_counts)
         else:
-            degreed["person_id"] = degreed["person_id"].astype(str).str.strip()
-            degreed["content_title"] = (
-                degreed["content_title"].astype(str).str.lower()
+            affected = pd.Index(delta_counts["person_id"].astype(str)).union(
+                pd.Index(delta_kw_counts["person_id"].astype(str))
             )
+            levels = _patch_levels(previous_levels, counts, kw_counts, affected)
+            s.extra["employees_recomputed"] = len(affected)
+        s.rows_out = len(levels)
+
+    if (
+        previous_levels is not None
+        and levels.equals(previous_levels)
+        and _outputs_current(output_path)
+    ):
+        print(f"Employee skills in {output_path.resolve()} are up to date.")
+    else:
+        _write_outputs(levels, output_path)
+
+    save_state(new_state, counts, kw_counts, levels)
+
+
+def employee_levels(course_counts: pd.DataFrame, keyword_counts: pd.DataFrame) -> pd.DataFrame:
+    """
+    skill_levels() as a table in output order: person_id, skill_name,
+    level, plus the employee's sort keys rank and first_keyword.
+
+    The employees are in the order in which skill_levels() first lists
+    them: those with a SAP course skill by person_id (rank 0), then the
+    Degreed-only ones by their first keyword and person_id (rank 1). Each
+    employee's entry depends only on their own counts, so the levels of a
+    subset of employees can be computed on their counts alone and merged
+    back in with _patch_levels().
+    """
+    best = skill_levels(course_counts, keyword_counts)
+    levels = pd.DataFrame(
+        {
+            "person_id": best.index.get_level_values("person_id").astype(str),
+            "skill_name": best.index.get_level_values("skill_name").astype(str),
+            "level": best.to_numpy().astype(str),
+        }
+    )
+    sap_levels = levels_from_counts(course_counts["course_count"], SAP_COUNT_LEVELS)
+    sap_persons = set(course_counts["person_id"][(sap_levels > "None").to_numpy()].astype(str))
+    kw_levels = levels_from_counts(keyword_counts["cnt"], DEGREED_COUNT_LEVELS)
+    kw_rows = keyword_counts[(kw_levels > "None").to_numpy()]
+    first_keyword = kw_rows.groupby(kw_rows["person_id"].astype(str))["keyword"].min()
+
+    rank = (~levels["person_id"].isin(sap_persons)).astype(np.int8)
+    levels["rank"] = rank
+    levels["first_keyword"] = np.where(
+        rank == 0, -1, levels["person_id"].map(first_keyword).fillna(-1)
+    ).astype(np.int64)
+    return _sort_levels(levels)
+
+
+def _sort_levels(levels: pd.DataFrame) -> pd.DataFrame:
+    """
+    Order employees by (rank, first_keyword, person_id); the stable sort
+    keeps each employee's skills in their order.
+    """
+    person_codes, _ = pd.factorize(levels["person_id"], sort=True)
+    order = np.lexsort((person_codes, levels["first_keyword"].to_numpy(), levels["rank"].to_numpy()))
+    return levels.iloc[order].reset_index(drop=True)
+
 
-            # Basic keyword → skill_name mapping (adjust to your needs)
-            keyword_to_skill = {
-                "python": "Python",
-                "mlops": "MLOps",
-                "machine learning": "Machine Learning",
-                "data quality": "Data Quality",
-                "sql": "SQL",
-                "ci/cd": "CI/CD",
-                "git": "Version Control",
-            }
-
-            rows = []
-            for keyword, skill_name in keyword_to_skill.items():
-                mask = degreed["content_title"].str.contains(keyword)
-                sub = degreed[mask].copy()
-                if sub.empty:
-                    continue
-                grp = sub.groupby("person_id").size().reset_index(name="cnt")
-                grp["skill_name"] = skill_name
-                rows.append(grp)
-
-            if rows:
-                degreed_counts = pd.concat(rows, ignore_index=True)
-
-                def degreed_level(n):
-                    if n >= 5:
-                        return "Advanced"
-                    elif n >= 3:
-                        return "Practitioner"
-                    elif n >= 1:
-                        return "Beginner"
-                    else:
-                        return "None"
-
-                degreed_counts["cnt"] = degreed_counts["cnt"].astype(int)
-                degreed_counts["level"] = degreed_counts["cnt"].apply(degreed_level)
-                degreed_skills = degreed_counts
-
-    # Build dictionary: employee_id -> {skill_name -> best_level}
-    employee_skills = {}
-    level_order = {"None": 0, "Beginner": 1, "Practitioner": 2, "Advanced": 3, "Expert": 4}
-
-    def update_skill(person_id: str, skill_name: str, level: str):
-        if person_id not in employee_skills:
-            employee_skills[person_id] = {}
-        current = employee_skills[person_id].get(skill_name, "None")
-        if level_order.get(level, 0) > level_order.get(current, 0):
-            employee_skills[person_id][skill_name] = level
-
-    # From SAP course participation
-    for _, row in counts.iterrows():
-        pid = str(row["person_id"])
-        skill_name = str(row["skill_name"])
-        level = str(row["level"])
-        update_skill(pid, skill_name, level)
-
-    # From Degreed (optional)
-    if degreed_skills is not None:
-        for _, row in degreed_skills.iterrows():
-            pid = str(row["person_id"])
-            skill_name = str(row["skill_name"])
-            level = str(row["level"])
-            update_skill(pid, skill_name, level)
-
-    # Convert to list of dicts
-    employees_list = []
-    for pid, skills_dict in employee_skills.items():
-        employees_list.append({"employee_id": pid, "skills": skills_dict})
-
-    output_path = Path("employee_skills.json")
-    output_path.write_text(
-        json.dumps(employees_list, indent=2, ensure_ascii=False), encoding="utf-8"
+def _patch_levels(previous: pd.DataFrame, course_counts: pd.DataFrame, keyword_counts: pd.DataFrame,
+                  affected: pd.Index) -> pd.DataFrame:
+    """
+    Stored levels with the entries of the affected employees recomputed
+    from their (updated) counts.
+    """
+    if affected.empty:
+        return previous
+    updated = employee_levels(
+        course_counts[course_counts["person_id"].astype(str).isin(affected)],
+        keyword_counts[keyword_counts["person_id"].astype(str).isin(affected)],
+    )
+    kept = previous[~previous["person_id"].isin(affected)]
+    return _sort_levels(pd.concat([kept, updated], ignore_index=True))
+
+
+def _outputs_current(output_path: Path) -> bool:
+    """
+    Whether output_path and its skill matrix / index from the previous run
+    are still in place and unmodified.
+    """
+    return (
+        Path(output_path).exists()
+        and inverted_index_path(output_path).exists()
+        and saved_skill_matrix(output_path) is not None
+    )
+
+
+def _write_outputs(levels: pd.DataFrame, output_path: Path):
+    """
+    Write the employee skills file, skill matrix and inverted index of an
+    employee_levels() table.
+    """
+    pairs = (
+        levels["person_id"].to_numpy(dtype=object),
+        levels["skill_name"].to_numpy(dtype=object),
+        levels["level"].to_numpy(dtype=object),
     )
+    with stage("write_employee_skills", rows_in=len(levels)) as s:
+        written = write_employee_skills(_employee_records(*pairs), output_path)
+        s.rows_out = written
+    print(f"Saved employee skills for {written} employees to {output_path.resolve()}")
+
+    with stage("write_skill_matrix", rows_in=len(levels)) as s:
+        matrix = SkillMatrix.from_pairs(*pairs)
+        matrix_path = matrix.save(skill_matrix_path(output_path), source=output_path)
+        InvertedSkillIndex.from_matrix(matrix).save(inverted_index_path(output_path), source=output_path)
+        s.rows_out = matrix.nnz
     print(
-        f"Saved employee skills for {len(employees_list)} employees to {output_path.resolve()}"
+        f"Saved {matrix.shape[0]} x {matrix.shape[1]} skill matrix "
+        f"({matrix.nnz} levels) to {matrix_path.resolve()}"
+    )
+
+
+def count_skills(training_rows: pd.DataFrame, skill_mapping: pd.DataFrame, degreed_rows, shard: str = ""):
+    """
+    (course counts, keyword counts) of the participation rows and the
+    Degreed rows (None = no Degreed data), see course_counts() and
+    keyword_counts().
+    """
+    with stage(f"sap_course_skills{shard}", rows_in=len(training_rows)) as s:
+        counts = course_counts(_course_skill_rows(training_rows, skill_mapping))
+        s.rows_out = len(counts)
+
+    # Optionally incorporate Degreed to bump some skills based on keywords
+    with stage(f"degreed_keyword_skills{shard}") as s:
+        if degreed_rows is None:
+            kw_counts = pd.DataFrame(
+                {"keyword": pd.Series(dtype=np.int64), "person_id": pd.Series(dtype=str),
+                 "cnt": pd.Series(dtype=int)}
+            )
+        else:
+            kw_counts = keyword_counts(degreed_rows)
+            s.rows_in = len(degreed_rows)
+        s.rows_out = len(kw_counts)
+    return counts, kw_counts
+
+
+def shard_numbers(person_ids: pd.Series, shards: int) -> np.ndarray:
+    """
+    Shard (0 .. shards-1) of every person_id: CRC32 of the ID text modulo
+    shards, so an employee lands in the same shard on every run and
+    machine (unlike hash(), which is salted per process).
+    """
+    codes, uniques = pd.factorize(person_ids)
+    # The extra last entry is the shard of missing IDs (code -1), which the
+    # counts drop anyway
+    by_id = np.array(
+        [zlib.crc32(str(person_id).strip().encode("utf-8")) % shards for person_id in uniques] + [0],
+        dtype=np.int64,
+    )
+    return by_id[codes]
+
+
+def _count_skills_sharded(training_rows: pd.DataFrame, skill_mapping: pd.DataFrame, degreed_rows,
+                          workers: int):
+    """
+    count_skills() with the rows split by shard_numbers() over a process
+    pool of workers processes.
+
+    Every employee's rows are in one shard, so the shards' counts never
+    share a key; concatenating and sorting them by key gives exactly the
+    counts of a serial run.
+    """
+    with stage("shard_rows") as s:
+        training_rows = training_rows[["person_id", "event_type_id"]]
+        training_shards = shard_numbers(training_rows["person_id"], workers)
+        if degreed_rows is not None:
+            degreed_rows = degreed_rows[["person_id", "content_title"]]
+            degreed_shards = shard_numbers(degreed_rows["person_id"], workers)
+        s.rows_in = len(training_rows) + (len(degreed_rows) if degreed_rows is not None else 0)
+
+    # Forked workers inherit the stage records made so far; the initializer
+    # drops them so that each worker only sends back its own
+    with ProcessPoolExecutor(max_workers=workers, initializer=instrumentation.collect) as executor:
+        futures = [
+            executor.submit(
+                _count_skills_in_worker,
+                training_rows[training_shards == shard],
+                skill_mapping,
+                degreed_rows[degreed_shards == shard] if degreed_rows is not None else None,
+                f":shard{shard}",
+            )
+            for shard in range(workers)
+        ]
+        results = []
+        for future in futures:
+            counts, kw_counts, records = future.result()
+            instrumentation.add_records(records)
+            results.append((counts, kw_counts))
+
+    with stage("merge_shards") as s:
+        counts = pd.concat([counts for counts, _ in results], ignore_index=True)
+        counts = counts.sort_values(["person_id", "skill_name"], ignore_index=True)
+        kw_counts = pd.concat([kw_counts for _, kw_counts in results], ignore_index=True)
+        kw_counts = kw_counts.sort_values(["keyword", "person_id"], ignore_index=True)
+        s.rows_out = len(counts) + len(kw_counts)
+    return counts, kw_counts
+
+
+def _count_skills_in_worker(training_rows, skill_mapping, degreed_rows, shard: str):
+    """
+    count_skills() in a worker process; also returns the worker's stage
+    records.
+    """
+    counts, kw_counts = count_skills(training_rows, skill_mapping, degreed_rows, shard)
+    return counts, kw_counts, instrumentation.collect()
+
+
+# --- incremental state ---
+
+
+def _rules_fingerprint(course_to_skill: pd.Series) -> str:
+    """
+    Hash of everything that decides which skill a row counts for.
+    """
+    rules = {
+        "course_to_skill": [[str(c), str(s)] for c, s in course_to_skill.items()],
+        "keywords": DEGREED_KEYWORDS,
+    }
+    return hashlib.sha256(json.dumps(rules, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_state():
+    """
+    State of the previous run (see save_state), or None.
+    """
+    path = STATE_DIR / STATE_FILE
+    if not path.exists():
+        return None
+    state = json.loads(path.read_text(encoding="utf-8"))
+    if state.get("version") != STATE_VERSION:
+        return None
+    return state
+
+
+def save_state(state: dict, course_counts: pd.DataFrame, keyword_counts: pd.DataFrame,
+               levels: pd.DataFrame):
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    write_table(course_counts, COURSE_COUNTS_TABLE, "parquet", STATE_DIR)
+    write_table(keyword_counts, KEYWORD_COUNTS_TABLE, "parquet", STATE_DIR)
+    write_table(levels, LEVELS_TABLE, "parquet", STATE_DIR)
+    (STATE_DIR / STATE_FILE).write_text(json.dumps(state, indent=2), encoding="utf-8")
+
+
+def _rows_hash(df: pd.DataFrame, columns) -> str:
+    """
+    Hash of the given columns of the rows, independent of row order and of
+    the format the table was read from.
+    """
+    columns = [col for col in columns if col in df.columns]
+    row_hashes = pd.util.hash_pandas_object(df[columns].astype(str), index=False).to_numpy()
+    return hashlib.sha256(np.sort(row_hashes).tobytes()).hexdigest()
+
+
+def _new_rows(table: str, date_col: str, hash_columns, state, source: str, counts_table: str):
+    """
+    Read the rows of table not counted yet.
+
+    Returns (rows to count, stored counts to add them to or None, new
+    source state). If the table file is the one read last time, it is not
+    read and there are no rows to count. Otherwise rows count as new when
+    their date is after the stored high-water mark; if the older (or
+    undated) rows hash differently from all rows counted last time, all
+    rows are returned for a recount.
+    """
+    source_state = (state or {}).get(source)
+    path, _ = find_table(table)
+    if path is None:
+        # Raises the usual "run main.py first" error
+        read_table(table)
+    stamp = source_stamp(path)
+    if source_state is not None and source_state["table"] == stamp:
+        print(f"{source}: {path.name} unchanged since the previous run")
+        return pd.DataFrame(columns=hash_columns), read_table(counts_table, STATE_DIR), source_state
+
+    df = read_table(table, parse_dates=[date_col])
+    dates = df[date_col]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors="coerce")
+    high_water_mark = dates.max()
+    new_state = {
+        "table": stamp,
+        "high_water_mark": None if pd.isna(high_water_mark) else high_water_mark.isoformat(),
+        "rows_hash": _rows_hash(df, hash_columns),
+    }
+    if source_state is None:
+        return df, None, new_state
+
+    previous_mark = source_state["high_water_mark"]
+    if previous_mark is None:
+        counted = dates.isna()
+    else:
+        counted = dates.isna() | (dates <= pd.Timestamp(previous_mark))
+    counted = counted.to_numpy()
+    if _rows_hash(df[counted], hash_columns) != source_state["rows_hash"]:
+        print(f"{source}: rows changed at or before {previous_mark}; recounting all rows.")
+        return df, None, new_state
+
+    previous = read_table(counts_table, STATE_DIR)
+    print(f"{source}: {int((~counted).sum())} new rows after {previous_mark}")
+    return df[~counted], previous, new_state
+
+
+def _add_counts(previous, delta: pd.DataFrame, keys, count_col: str) -> pd.DataFrame:
+    """
+    Stored counts plus the counts of the new rows, sorted by keys.
+    """
+    if previous is None:
+        return delta
+    if delta.empty:
+        return previous
+    for key in keys:
+        # Keep the dtypes of the stored counts (person_id strings)
+        delta[key] = delta[key].astype(previous[key].dtype)
+    counts = pd.concat([previous, delta], ignore_index=True)
+    counts = counts.groupby(keys).sum().reset_index()
+    counts[count_col] = counts[count_col].astype(int)
+    return counts
+
+
+def _employee_records(person_ids, skill_names, levels):
+    """
+    Yield {"employee_id", "skills"} records from the person_id, skill_name
+    and level arrays of an employee_levels() table, one employee at a time.
+    """
+    boundaries = np.flatnonzero(person_ids[1:] != person_ids[:-1]) + 1
+    starts = np.concatenate(([0], boundaries)) if len(person_ids) else []
+    ends = np.concatenate((boundaries, [len(person_ids)])) if len(person_ids) else []
+    for start, end in zip(starts, ends):
+        yield {
+            "employee_id": person_ids[start],
+            "skills": dict(zip(skill_names[start:end], levels[start:end])),
+        }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build employee_skills.json from the main.py tables.")
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        type=Path,
+        const=DEFAULT_PROFILE_PATH,
+        default=None,
+        metavar="REPORT",
+        help="Record wall/CPU time, peak RSS and row counts of every phase, print a summary "
+        f"and save a JSON report (default: output/{DEFAULT_PROFILE_PATH.name}).",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=DEFAULT_OUTPUT_PATH,
+        help="Output file; the suffix selects the format: "
+        f"{', '.join(EMPLOYEE_SKILLS_FORMATS.values())} (one record per line, streamed).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only count participation / Degreed rows dated after the previous run, "
+        "add them to the stored counts and recompute the levels of those employees.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes counting courses and Degreed keywords, each for one "
+        "shard of the employees (default: %(default)s, 1 = in this process).",
     )
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    build_employee_skills()
\ No newline at end of file
+    args = parse_args()
+    if args.profile is not None:
+        instrumentation.enable()
+    build_employee_skills(args.output, incremental=args.incremental, workers=args.workers)
+    if args.profile is not None:
+        instrumentation.print_summary("build_employee_skills profile")
+        report = instrumentation.write_report(args.profile, run="build_employee_skills")
+        print(f"Saved profile report to {report.resolve()}")
\ No newline at end of file
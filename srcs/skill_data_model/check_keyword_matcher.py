@@ -0,0 +1,118 @@
+"""
+Checks of keyword_matcher.KeywordMatcher.
+
+    python3 check_keyword_matcher.py
+
+1. Without boundary rules the matcher finds exactly the keywords that
+   `keyword in title` (the substring test build_employee_skills_real.py used
+   before) finds, on fixed titles and on the Degreed titles in output/ if
+   main.py has written them.
+2. The boundary rules of DEGREED_KEYWORDS are pinned on the titles that
+   motivated them (github / digital for "git", ci/cd / cicd for "ci/cd") and
+   on overlapping keywords.
+Prints what it checked and exits with an error on the first mismatch.
+"""
+import sys
+
+from keyword_matcher import KeywordMatcher
+
+SUBSTRING_TITLES = [
+    "",
+    "python and sql",
+    "Advanced SQL for analysts",
+    "mysql basics",
+    "GitHub Actions",
+    "digital transformation",
+    "CI/CD pipelines",
+    "cicd",
+    "machine learning with python",
+    "mlops / machine learning ops",
+    "data quality in practice",
+    "sqlsqlsql",
+]
+
+# (title, keywords that must match) for DEGREED_KEYWORDS with their boundary rules
+BOUNDARY_CASES = [
+    ("github actions", {"git"}),
+    ("git basics", {"git"}),
+    ("intro to git", {"git"}),
+    ("using git-flow", {"git"}),
+    ("digital transformation", set()),
+    ("legit tools", set()),
+    ("ci/cd pipelines", {"ci/cd"}),
+    ("intro to ci/cd", {"ci/cd"}),
+    ("(ci/cd)", {"ci/cd"}),
+    ("cicd pipelines", set()),
+    ("ci/cdx", set()),
+    ("xci/cd", set()),
+    ("python and sql", {"python", "sql"}),
+    ("mysql", {"sql"}),
+    ("mlops and machine learning", {"mlops", "machine learning"}),
+]
+
+# Overlapping keywords: every keyword that is a substring of another, or
+# that overlaps it, is still reported
+OVERLAP_KEYWORDS = ["he", "she", "his", "hers", "machine", "machine learning", "learning"]
+OVERLAP_CASES = [
+    ("ushers", {"he", "she", "hers"}),
+    ("this", {"his"}),
+    ("machine learning", {"machine", "machine learning", "learning"}),
+    ("machinelearning", {"machine", "learning"}),
+]
+
+
+def _found(matcher, text):
+    return {matcher.keywords[i] for i in matcher.match(text)}
+
+
+def check(condition, message):
+    if not condition:
+        print(f"FAILED: {message}")
+        sys.exit(1)
+
+
+def check_substring_equivalence(keywords, titles) -> int:
+    matcher = KeywordMatcher(keywords)
+    for title in titles:
+        expected = {k for k in keywords if k in title.lower()}
+        found = _found(matcher, title)
+        check(found == expected, f"{title!r}: matcher {sorted(found)} != substring {sorted(expected)}")
+    return len(titles)
+
+
+def _degreed_titles():
+    from table_io import find_table, read_table
+
+    if find_table("degreed_learning")[0] is None:
+        return []
+    titles = read_table("degreed_learning")["content_title"].dropna().astype(str)
+    return titles.unique().tolist()
+
+
+def main():
+    from build_employee_skills_real import DEGREED_KEYWORDS, DEGREED_MATCHER
+
+    keywords = [keyword for keyword, _, _ in DEGREED_KEYWORDS]
+    n = check_substring_equivalence(keywords, SUBSTRING_TITLES)
+    n += check_substring_equivalence(OVERLAP_KEYWORDS, [t for t, _ in OVERLAP_CASES])
+    print(f"substring equivalence: {n} fixed titles OK")
+
+    titles = _degreed_titles()
+    if titles:
+        check_substring_equivalence(keywords, titles)
+        print(f"substring equivalence: {len(titles)} Degreed titles from output/ OK")
+
+    for title, expected in BOUNDARY_CASES:
+        found = _found(DEGREED_MATCHER, title)
+        check(found == expected, f"{title!r}: found {sorted(found)}, expected {sorted(expected)}")
+    print(f"boundary rules: {len(BOUNDARY_CASES)} cases OK")
+
+    overlap = KeywordMatcher(OVERLAP_KEYWORDS, ["word" if k == "machine learning" else None
+                                                for k in OVERLAP_KEYWORDS])
+    check(_found(overlap, "machine learnings") == {"machine", "learning"},
+          "'word' rule on an overlapping keyword")
+    print("overlapping keywords with boundary rules: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,39 @@
+import os
 from pathlib import Path
 
 # Base directory = folder where this config.py is located
 BASE_DIR = Path(__file__).resolve().parent
 
-DATA_DIR = BASE_DIR / "data"
+# Input files; SKILL_DATA_DIR points the loaders at another directory
+# (e.g. synthetic data written by synthetic_data.py)
+DATA_DIR = Path(os.environ.get("SKILL_DATA_DIR", BASE_DIR / "data"))
 OUTPUT_DIR = BASE_DIR / "output"
 
+# Parsed xlsx sources (see excel_cache.py)
+EXCEL_CACHE_DIR = DATA_DIR / ".cache"
+EXCEL_CACHE_MAX_BYTES = int(os.environ.get("EXCEL_CACHE_MAX_BYTES", str(2 * 1024**3)))
+
 # Make sure output directory exists
-OUTPUT_DIR.mkdir(exist_ok=True)
\ No newline at end of file
+OUTPUT_DIR.mkdir(exist_ok=True)
+
+# Default file format of the main.py output tables: csv, parquet or feather
+OUTPUT_FORMAT = os.environ.get("OUTPUT_FORMAT", "csv")
+
+# Default number of processes for main.py --workers (1 = sequential)
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", "1"))
+
+# Fallback matching of strategy skill codes to internal skill names, used
+# for employees with none of the names mapped in strategy_skill_mapping.json:
+# [part of the skill code, [parts of internal skill names it accepts]],
+# compared in lower case. STRATEGY_FUZZY_RULES_FILE may name a JSON file
+# with a list of the same shape to use instead.
+STRATEGY_FUZZY_RULES = [
+    ["python", ["python"]],
+    ["mlops", ["mlops", "machine learning"]],
+    ["ci", ["ci/cd", "continuous integration", "version control", "devops"]],
+    ["sql", ["sql"]],
+]
+STRATEGY_FUZZY_RULES_FILE = os.environ.get("STRATEGY_FUZZY_RULES_FILE")
+
+# Compiled strategy skill resolutions (see strategy_skill_resolver.py)
+STRATEGY_RESOLVER_CACHE_DIR = OUTPUT_DIR / "strategy_resolver"
@@ -0,0 +1,172 @@
+"""
+Streaming reading and writing of employee_skills.json.
+
+The employee skills are a list of {"employee_id": ..., "skills": {...}}
+records. Three encodings are supported, chosen by the file name:
+
+    employee_skills.json      pretty-printed JSON array (indent=2), as before
+    employee_skills.jsonl     one compact JSON record per line
+    employee_skills.jsonl.gz  the same, gzip-compressed (smallest on disk)
+
+write_employee_skills() takes any iterable of records and writes them one at
+a time; iter_employee_skills() yields them one at a time, also from the
+pretty-printed array, so neither side holds the whole file in memory.
+"""
+import gzip
+import json
+from pathlib import Path
+
+EMPLOYEE_SKILLS_FORMATS = {
+    "json": ".json",
+    "jsonl": ".jsonl",
+    "jsonl.gz": ".jsonl.gz",
+}
+EMPLOYEE_SKILLS_STEM = "employee_skills"
+
+_READ_SIZE = 1 << 16
+
+
+def employee_skills_format(path: Path) -> str:
+    name = Path(path).name
+    for fmt in sorted(EMPLOYEE_SKILLS_FORMATS, key=len, reverse=True):
+        if name.endswith(EMPLOYEE_SKILLS_FORMATS[fmt]):
+            return fmt
+    raise ValueError(
+        f"Unknown employee skills format for {name}; "
+        f"use one of {', '.join(EMPLOYEE_SKILLS_FORMATS.values())}"
+    )
+
+
+def find_employee_skills(base_dir: Path = Path(".")) -> Path:
+    """
+    The most recently written employee_skills.* file in base_dir, or the
+    .json path (which may not exist) if there is none.
+    """
+    candidates = [
+        Path(base_dir) / f"{EMPLOYEE_SKILLS_STEM}{suffix}"
+        for suffix in EMPLOYEE_SKILLS_FORMATS.values()
+    ]
+    existing = [p for p in candidates if p.exists()]
+    if not existing:
+        return candidates[0]
+    return max(existing, key=lambda p: p.stat().st_mtime_ns)
+
+
+def _open_text(path: Path, mode: str):
+    if employee_skills_format(path) == "jsonl.gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def write_employee_skills(records, path: Path) -> int:
+    """
+    Write the records to path in the format given by its name and return
+    how many were written. The .json output is byte-identical to
+    json.dumps(list(records), indent=2, ensure_ascii=False).
+    """
+    path = Path(path)
+    fmt = employee_skills_format(path)
+    count = 0
+    with _open_text(path, "w") as f:
+        if fmt == "json":
+            for record in records:
+                text = json.dumps(record, indent=2, ensure_ascii=False)
+                f.write("[\n  " if count == 0 else ",\n  ")
+                f.write(text.replace("\n", "\n  "))
+                count += 1
+            f.write("\n]" if count else "[]")
+        else:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+                f.write("\n")
+                count += 1
+    return count
+
+
+def _iter_json_array(f):
+    """
+    Yield the elements of a top-level JSON array from a text file without
+    parsing the whole file at once. Malformed arrays (missing or extra
+    commas, trailing data) raise json.JSONDecodeError like json.loads.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(_READ_SIZE)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def next_char():
+        """
+        The next non-whitespace character (not consumed), or "" at the end.
+        """
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buffer) or eof:
+                return buffer[pos] if pos < len(buffer) else ""
+            fill()
+
+    def error(message):
+        return json.JSONDecodeError(message, buffer, pos)
+
+    if next_char() != "[":
+        raise error("Employee skills JSON must be an array")
+    pos += 1
+
+    # Elements separated by exactly one comma; no trailing comma
+    if next_char() == "]":
+        pos += 1
+    else:
+        while True:
+            while True:
+                try:
+                    element, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    fill()
+                    continue
+                # A number may continue in the next chunk
+                if end == len(buffer) and not eof:
+                    fill()
+                    continue
+                break
+            pos = end
+            yield element
+
+            char = next_char()
+            if char == ",":
+                pos += 1
+                if next_char() in ("]", ""):
+                    raise error("Expecting value")
+            elif char == "]":
+                pos += 1
+                break
+            else:
+                raise error("Expecting ',' delimiter")
+
+    if next_char() != "":
+        raise error("Extra data")
+
+
+def iter_employee_skills(path: Path):
+    """
+    Yield the employee records of path one at a time.
+    """
+    path = Path(path)
+    fmt = employee_skills_format(path)
+    with _open_text(path, "r") as f:
+        if fmt == "json":
+            yield from _iter_json_array(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
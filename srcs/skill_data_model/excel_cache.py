@@ -0,0 +1,205 @@
+"""
+On-disk cache for the DataFrames produced by the xlsx loaders.
+
+Parsing Excel through openpyxl is the slowest step of the ingest, while the
+source workbooks rarely change between runs. A loader decorated with
+cached_excel_loader() stores its cleaned result as Parquet under
+EXCEL_CACHE_DIR and serves it from there as long as the source file (size,
+mtime, content hash), the loader version and the call arguments are the same.
+
+Set EXCEL_CACHE=0 to bypass the cache, call invalidate() (or run
+main.py --clear-cache) to drop it. The cache is trimmed to
+EXCEL_CACHE_MAX_BYTES, least recently used entries first.
+"""
+import functools
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from config import DATA_DIR, EXCEL_CACHE_DIR, EXCEL_CACHE_MAX_BYTES
+from instrumentation import stage
+
+_META_FILE = "meta.json"
+
+_warned_no_parquet = False
+
+
+def file_fingerprint(path: Path) -> dict:
+    """
+    Return size, mtime and SHA-256 content hash of a file.
+    """
+    stat = path.stat()
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest.hexdigest(),
+    }
+
+
+def is_enabled() -> bool:
+    """
+    The cache is on unless EXCEL_CACHE=0 and needs pyarrow for Parquet.
+    Read from the environment so that worker processes follow the parent.
+    """
+    global _warned_no_parquet
+
+    if os.environ.get("EXCEL_CACHE", "1") == "0":
+        return False
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        if not _warned_no_parquet:
+            print("Warning: pyarrow is not installed; Excel cache disabled.")
+            _warned_no_parquet = True
+        return False
+    return True
+
+
+def _short_hash(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:16]
+
+
+def _entry_size(entry: Path) -> int:
+    return sum(p.stat().st_size for p in entry.iterdir())
+
+
+def _read_entry(entry: Path):
+    meta_path = entry / _META_FILE
+    if not meta_path.exists():
+        return None
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        frames = [pd.read_parquet(entry / f"part{i}.parquet") for i in range(meta["parts"])]
+    except (OSError, ValueError, KeyError):
+        # Broken entry (e.g. interrupted write); drop it and parse again
+        shutil.rmtree(entry, ignore_errors=True)
+        return None
+
+    # Mark as recently used for the eviction order
+    os.utime(meta_path)
+    return tuple(frames) if meta["is_tuple"] else frames[0]
+
+
+def _write_entry(entry: Path, result, meta: dict):
+    frames = list(result) if isinstance(result, tuple) else [result]
+
+    # Write into a temporary directory and rename, so that concurrent
+    # workers never see a half-written entry.
+    tmp = entry.with_name(f"{entry.name}.tmp{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for i, df in enumerate(frames):
+        df.to_parquet(tmp / f"part{i}.parquet")
+    meta = dict(meta, parts=len(frames), is_tuple=isinstance(result, tuple))
+    (tmp / _META_FILE).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    try:
+        tmp.rename(entry)
+    except OSError:
+        # Another worker stored the same entry first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def evict(max_bytes: int = None):
+    """
+    Remove least recently used entries until the cache fits into max_bytes
+    (default: EXCEL_CACHE_MAX_BYTES).
+    """
+    if max_bytes is None:
+        max_bytes = EXCEL_CACHE_MAX_BYTES
+    if not EXCEL_CACHE_DIR.exists():
+        return
+
+    entries = []
+    for entry in EXCEL_CACHE_DIR.iterdir():
+        meta_path = entry / _META_FILE
+        if entry.is_dir() and meta_path.exists():
+            entries.append((meta_path.stat().st_mtime, _entry_size(entry), entry))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+
+
+def invalidate(loader_name: str = None) -> int:
+    """
+    Drop all cache entries, or only those of one loader function.
+    Returns the number of removed entries.
+    """
+    if not EXCEL_CACHE_DIR.exists():
+        return 0
+    removed = 0
+    for entry in EXCEL_CACHE_DIR.iterdir():
+        if loader_name is None or entry.name.startswith(f"{loader_name}-"):
+            shutil.rmtree(entry, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def cached_excel_loader(source_filename: str, version: int):
+    """
+    Decorator for a loader that parses DATA_DIR / source_filename and returns
+    a DataFrame or a tuple of DataFrames.
+
+    Bump version whenever the loader's cleaning logic changes, so that old
+    entries are no longer served.
+    """
+
+    def decorator(loader):
+        @functools.wraps(loader)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return loader(*args, **kwargs)
+
+            source = DATA_DIR / source_filename
+            fingerprint = file_fingerprint(source)
+            call_key = _short_hash(repr((version, args, sorted(kwargs.items()))))
+            source_key = _short_hash(
+                f"{source_filename}|{fingerprint['size']}|"
+                f"{fingerprint['mtime_ns']}|{fingerprint['sha256']}"
+            )
+            prefix = f"{loader.__name__}-{call_key}-"
+            entry = EXCEL_CACHE_DIR / f"{prefix}{source_key}"
+
+            with stage(f"excel_cache:{source_filename}") as s:
+                result = _read_entry(entry)
+                s.extra["hit"] = result is not None
+            if result is not None:
+                return result
+
+            result = loader(*args, **kwargs)
+
+            # Older entries for the same loader call are stale now
+            EXCEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            for old in EXCEL_CACHE_DIR.glob(f"{prefix}*"):
+                if old != entry:
+                    shutil.rmtree(old, ignore_errors=True)
+
+            _write_entry(
+                entry,
+                result,
+                {
+                    "loader": loader.__name__,
+                    "loader_version": version,
+                    "source": source_filename,
+                    "source_fingerprint": fingerprint,
+                    "created": time.time(),
+                },
+            )
+            evict()
+            return result
+
+        return wrapper
+
+    return decorator
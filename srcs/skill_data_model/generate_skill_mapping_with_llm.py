@@ -4,6 +4,9 @@ import sys
 import requests
 from collections import Counter
 
+from employee_skills_io import iter_employee_skills
+from skill_matrix import saved_skill_matrix
+
 
 def call_azure_openai(api_url, api_key, api_version, deployment_name, system_message, user_message):
     headers = {
@@ -56,18 +59,25 @@ def main():
         sys.exit(1)
 
     strategy_text = strategy_md_path.read_text(encoding="utf-8")
-    employee_skills_data = json.loads(employee_skills_path.read_text(encoding="utf-8"))
-
-    # Collect unique skill names and their frequency
-    counter = Counter()
-    for emp in employee_skills_data:
-        skills = emp.get("skills", {})
-        for name in skills.keys():
-            counter[name] += 1
-
     # To keep prompt reasonable, take top N most common skills
     TOP_SKILLS = 100
-    top_skills = [name for name, _cnt in counter.most_common(TOP_SKILLS)]
+
+    # Collect unique skill names and their frequency: from the skill matrix
+    # written next to the employee skills if it was built from this file,
+    # otherwise by reading the employee skills (.json / .jsonl / .jsonl.gz)
+    # one at a time
+    matrix = saved_skill_matrix(employee_skills_path)
+    if matrix is not None:
+        most_common = matrix.most_common(TOP_SKILLS)
+    else:
+        counter = Counter()
+        for emp in iter_employee_skills(employee_skills_path):
+            skills = emp.get("skills", {})
+            for name in skills.keys():
+                counter[name] += 1
+        most_common = counter.most_common(TOP_SKILLS)
+
+    top_skills = [name for name, _cnt in most_common]
 
     system_message = (
         "You are an HR skills mapping assistant.\n"
@@ -0,0 +1,75 @@
+"""
+Manifest of the last main.py run, used for incremental re-ingest.
+
+It records the fingerprint of every source file in DATA_DIR (size and mtime,
+plus a content hash once an --incremental run had to look at the file) and
+which output tables each of them feeds. On the next run only tables fed by a
+changed (or new) source file, or whose output file is missing, need to be
+rebuilt.
+"""
+import json
+from pathlib import Path
+
+from config import DATA_DIR, OUTPUT_DIR
+from excel_cache import file_fingerprint
+
+MANIFEST_PATH = OUTPUT_DIR / "ingest_manifest.json"
+
+
+def load_manifest(path: Path = MANIFEST_PATH) -> dict:
+    """
+    Return the stored manifest, or an empty one if there is none (or it is
+    unreadable, in which case everything is considered changed).
+    """
+    if not path.exists():
+        return {"format": None, "sources": {}, "tables": {}}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        print(f"Warning: {path.name} is not valid JSON; ignoring it.")
+        return {"format": None, "sources": {}, "tables": {}}
+
+
+def save_manifest(manifest: dict, path: Path = MANIFEST_PATH):
+    path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def source_fingerprint(filename: str, previous: dict = None, hash_content: bool = True) -> dict:
+    """
+    Fingerprint of DATA_DIR / filename. If size and mtime are unchanged
+    compared to the previous fingerprint, that is reused instead of reading
+    the whole file again. With hash_content=False a changed file gets only
+    its size and mtime (sha256 None).
+    """
+    path = DATA_DIR / filename
+    stat = path.stat()
+    if previous and stat.st_size == previous.get("size") and stat.st_mtime_ns == previous.get("mtime_ns"):
+        return previous
+    if not hash_content:
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": None}
+    return file_fingerprint(path)
+
+
+def changed_sources(manifest: dict, filenames, hash_content: bool = True) -> dict:
+    """
+    Fingerprint the given source files and return {filename: fingerprint}
+    for those that differ from the manifest (or that are new).
+
+    Files with the size and mtime recorded in the manifest are not read.
+    Otherwise, with hash_content=True, the content is hashed, and a file that
+    was only touched (same hash) does not count as changed; without a hash
+    on either side a new size or mtime counts as a change. A full main.py
+    run passes hash_content=False, since it parses every file anyway.
+    """
+    changed = {}
+    for filename in filenames:
+        previous = manifest["sources"].get(filename)
+        current = source_fingerprint(filename, previous, hash_content)
+        if current is previous:
+            continue
+        if previous is None or current["sha256"] is None or current["sha256"] != previous.get("sha256"):
+            changed[filename] = current
+        else:
+            # Same content, new mtime: remember it so the next run can skip hashing
+            manifest["sources"][filename] = current
+    return changed
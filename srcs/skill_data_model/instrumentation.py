@@ -0,0 +1,230 @@
+"""
+Per-stage timing and memory instrumentation for the data pipeline.
+
+Code marks the interesting parts of a run as stages:
+
+    with stage("load:person_position_history") as s:
+        df = load_rhrhaz00_ps(...)
+        s.rows_out = len(df)
+
+and, when profiling is enabled, every stage records its wall time, CPU
+time, peak RSS and rows in / out. At the end of a run write_report() saves
+the records as JSON and print_summary() prints a table aggregated by stage
+name. When profiling is disabled, stage() only checks a flag and hands out
+a shared dummy record, so instrumented code pays next to nothing.
+
+Profiling is switched on with enable() (main.py / build_employee_skills
+--profile) or the PIPELINE_PROFILE=1 environment variable; enable() also
+sets the variable, so worker processes started afterwards profile as well
+and return their records with their results (see collect()).
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+PROFILE_ENV = "PIPELINE_PROFILE"
+
+_enabled = os.environ.get(PROFILE_ENV, "0") == "1"
+_records = []
+# Stages currently running (nested stages)
+_open_stages = []
+
+
+class _Stage:
+    __slots__ = ("name", "rows_in", "rows_out", "extra", "peak_rss_mb")
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.extra = {}
+        self.peak_rss_mb = None
+
+
+class _IgnoredDict(dict):
+    def __setitem__(self, key, value):
+        pass
+
+    def update(self, *args, **kwargs):
+        pass
+
+
+class _DisabledStage:
+    """
+    Accepts and forgets everything a stage record is given.
+    """
+
+    __slots__ = ()
+    rows_in = rows_out = None
+    extra = _IgnoredDict()
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_DISABLED = _DisabledStage()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable():
+    global _enabled
+    _enabled = True
+    # Inherited by worker processes
+    os.environ[PROFILE_ENV] = "1"
+
+
+def _reset_peak_rss():
+    """
+    Reset the kernel's peak RSS counter (Linux), so the peak reported for a
+    top-level stage is the stage's own and not the whole process's so far.
+    Only called when no stage is open: writing clear_refs walks the whole
+    page table, which is too slow to do on every nested stage.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024**2 if sys.platform == "darwin" else 1024), 1)
+
+
+def _max(a, b):
+    if a is None:
+        return b
+    return a if b is None else max(a, b)
+
+
+@contextmanager
+def stage(name: str, rows_in: int = None):
+    """
+    Record one stage of the pipeline (see module docstring). The yielded
+    record takes rows_out (and rows_in, if not known up front) and an
+    extra dict for anything else worth reporting.
+    """
+    if not _enabled:
+        yield _DISABLED
+        return
+
+    record = _Stage(name, rows_in)
+    # Nested stages report the peak since their top-level stage started
+    if not _open_stages:
+        _reset_peak_rss()
+    _open_stages.append(record)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield record
+    finally:
+        _open_stages.remove(record)
+        _records.append(
+            {
+                "stage": record.name,
+                "wall_s": round(time.perf_counter() - wall_start, 4),
+                "cpu_s": round(time.process_time() - cpu_start, 4),
+                "peak_rss_mb": _max(record.peak_rss_mb, _peak_rss_mb()),
+                "rows_in": record.rows_in,
+                "rows_out": record.rows_out,
+                "pid": os.getpid(),
+                **record.extra,
+            }
+        )
+
+
+def collect() -> list:
+    """
+    Return and clear the records of this process (used by worker processes
+    to send their records back with their result).
+    """
+    records = list(_records)
+    _records.clear()
+    return records
+
+
+def add_records(records):
+    """
+    Add records collected in another process.
+    """
+    _records.extend(records)
+
+
+def records() -> list:
+    return list(_records)
+
+
+def summarize(stage_records=None) -> list:
+    """
+    Aggregate records by stage name, in order of first appearance.
+    """
+    summary = {}
+    for rec in _records if stage_records is None else stage_records:
+        row = summary.setdefault(
+            rec["stage"],
+            {"stage": rec["stage"], "calls": 0, "wall_s": 0.0, "cpu_s": 0.0,
+             "peak_rss_mb": None, "rows_in": None, "rows_out": None},
+        )
+        row["calls"] += 1
+        row["wall_s"] += rec["wall_s"]
+        row["cpu_s"] += rec["cpu_s"]
+        if rec["peak_rss_mb"] is not None:
+            row["peak_rss_mb"] = _max(row["peak_rss_mb"], rec["peak_rss_mb"])
+        for key in ("rows_in", "rows_out"):
+            if rec[key] is not None:
+                row[key] = (row[key] or 0) + rec[key]
+    for row in summary.values():
+        row["wall_s"] = round(row["wall_s"], 4)
+        row["cpu_s"] = round(row["cpu_s"], 4)
+    return list(summary.values())
+
+
+def print_summary(title: str = "Pipeline profile"):
+    if not _enabled:
+        return
+    rows = summarize()
+
+    def fmt(value):
+        return "" if value is None else f"{value}"
+
+    print(f"\n{title}")
+    print(f"{'stage':60s} {'calls':>5s} {'wall s':>9s} {'cpu s':>9s} "
+          f"{'peak MB':>9s} {'rows in':>10s} {'rows out':>10s}")
+    for row in rows:
+        print(
+            f"{row['stage'][:60]:60s} {row['calls']:5d} {row['wall_s']:9.3f} {row['cpu_s']:9.3f} "
+            f"{fmt(row['peak_rss_mb']):>9s} {fmt(row['rows_in']):>10s} {fmt(row['rows_out']):>10s}"
+        )
+
+
+def write_report(path: Path, run: str = None) -> Path:
+    """
+    Save all records (and their summary) of this run as JSON.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "run": run,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "argv": sys.argv,
+        "stages": records(),
+        "summary": summarize(),
+    }
+    path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return path
@@ -0,0 +1,114 @@
+"""
+Multi-keyword matching in one pass over a text (Aho-Corasick automaton).
+
+Scanning every title once per keyword (Series.str.contains in a loop) costs
+O(keywords x rows). KeywordMatcher compiles all keywords into one automaton
+that finds every keyword occurring in a text in a single scan, so the cost
+per text hardly grows with the number of keywords.
+
+Keywords are plain strings (no regex). Each can carry a boundary rule:
+    None     match anywhere, also inside a word ("sql" in "mysql")
+    "start"  the match must start a word ("git" in "github", not "digital")
+    "word"   the match must be a whole word ("ci/cd", not "ci/cdx")
+A word character is a letter or digit.
+"""
+from collections import deque
+
+BOUNDARIES = (None, "start", "word")
+
+
+class KeywordMatcher:
+    """
+    Compiled set of keywords. match(text) returns the indices (into the
+    keywords list) of all keywords found in text, sorted.
+    """
+
+    def __init__(self, keywords, boundaries=None, case_sensitive: bool = False):
+        self.keywords = list(keywords)
+        self.boundaries = list(boundaries) if boundaries is not None else [None] * len(self.keywords)
+        if len(self.boundaries) != len(self.keywords):
+            raise ValueError("boundaries must have one entry per keyword")
+        for keyword, boundary in zip(self.keywords, self.boundaries):
+            if not keyword:
+                raise ValueError("Keywords must not be empty")
+            if boundary not in BOUNDARIES:
+                raise ValueError(f"Unknown boundary rule {boundary!r} for keyword {keyword!r}")
+        self.case_sensitive = case_sensitive
+        self._build()
+
+    def _build(self):
+        # State 0 is the root. goto[state] maps a character to the next state,
+        # out[state] lists the keywords ending in that state.
+        goto = [{}]
+        out = [[]]
+        lengths = []
+        for index, keyword in enumerate(self.keywords):
+            if not self.case_sensitive:
+                keyword = keyword.lower()
+            lengths.append(len(keyword))
+            state = 0
+            for char in keyword:
+                nxt = goto[state].get(char)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][char] = nxt
+                    goto.append({})
+                    out.append([])
+                state = nxt
+            out[state].append(index)
+
+        # Failure links, breadth first: the longest proper suffix of a state's
+        # path that is also a path from the root
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and char not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(char, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+        self._lengths = lengths
+
+    def _boundary_ok(self, text: str, index: int, end: int) -> bool:
+        boundary = self.boundaries[index]
+        if boundary is None:
+            return True
+        start = end - self._lengths[index] + 1
+        if start > 0 and text[start - 1].isalnum():
+            return False
+        if boundary == "word" and end + 1 < len(text) and text[end + 1].isalnum():
+            return False
+        return True
+
+    def match(self, text) -> list:
+        """
+        Sorted indices of the keywords occurring in text.
+        """
+        if not isinstance(text, str):
+            return []
+        if not self.case_sensitive:
+            text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in out[state]:
+                if index not in found and self._boundary_ok(text, index, end):
+                    found.add(index)
+        return sorted(found)
+
+    def match_many(self, texts) -> list:
+        """
+        match() for every text; a list of index lists.
+        """
+        return [self.match(text) for text in texts]
@@ -0,0 +1,295 @@
+"""
+Helpers shared by the loaders_* modules.
+"""
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import stage
+
+# Fixed code lists, so that the parts of a table (e.g. the ZP / ZS / ZX links)
+# share one categorical dtype and stay categorical when concatenated.
+Z_TYPE_DTYPE = pd.CategoricalDtype(["ZP", "ZS", "ZX"])
+LANG_DTYPE = pd.CategoricalDtype(["CS", "DE", "EN"])
+
+# One dtype per ID domain, used by every table holding an ID of that domain
+# so that joins line up. SAP object IDs (and the Degreed employee ID, which
+# is the SAP person_id) are plain 8-digit numbers: nullable Int32. A domain
+# whose IDs are not all plain numbers (letters, leading zeros) must be
+# declared "string".
+ID_DTYPES = {
+    "person": "Int32",
+    "position": "Int32",
+    "task": "Int32",
+    "z_object": "Int32",
+    "qualification": "Int32",
+    "event_instance": "Int32",
+    "program": "Int32",
+}
+
+# Compact dtype schema per output table, applied with compact=True:
+#   ("id", domain)  ID of that domain -> ID_DTYPES[domain]; a value that does
+#                   not fit (e.g. "0200" or "A1" for an Int32 domain) raises
+#                   ValueError
+#   "category"      low-cardinality code -> pandas categorical
+#   a CategoricalDtype -> categorical with exactly these categories
+TABLE_SCHEMAS = {
+    "person_position_history": {"person_id": ("id", "person"), "position_id": ("id", "position")},
+    "position_tasks": {"position_id": ("id", "position"), "task_id": ("id", "task")},
+    "task_z_links": {
+        "task_id": ("id", "task"),
+        "z_id": ("id", "z_object"),
+        "z_type": Z_TYPE_DTYPE,
+    },
+    "z_descriptions": {"z_type": Z_TYPE_DTYPE, "z_id": ("id", "z_object"), "lang": LANG_DTYPE},
+    "qualifications": {"qualification_id": ("id", "qualification")},
+    "person_qualification_history": {
+        "person_id": ("id", "person"),
+        "qualification_id": ("id", "qualification"),
+    },
+    "training_events": {"event_type_id": "category"},
+    "training_participation": {
+        "person_id": ("id", "person"),
+        "event_type_id": "category",
+        "event_instance_id": ("id", "event_instance"),
+    },
+    "skill_mapping": {
+        "course_code": "category",
+        "department": "category",
+        "skill_name": "category",
+        "category": "category",
+    },
+    "programs": {"program_id": ("id", "program"), "parent_program_id": ("id", "program")},
+    "degreed_learning": {
+        "person_id": ("id", "person"),
+        "content_type": "category",
+        "content_provider": "category",
+        "verified_flag": "category",
+    },
+}
+
+_INT_RANGES = {
+    "Int32": (np.iinfo(np.int32).min, np.iinfo(np.int32).max),
+    "Int64": (np.iinfo(np.int64).min, np.iinfo(np.int64).max),
+}
+
+
+def _compact_id(values: pd.Series, dtype: str, table: str) -> pd.Series:
+    """
+    Convert a column of ID strings to the ID domain's dtype. Raises
+    ValueError if a value is not a plain integer in range (it would not
+    survive the round trip, or would not join with the same ID elsewhere).
+    """
+    if dtype == "string":
+        return values.astype("string")
+
+    present = values.notna()
+    text = values[present].astype(str)
+    numbers = pd.to_numeric(text, errors="coerce")
+    low, high = _INT_RANGES[dtype]
+    fits = numbers.notna() & (numbers >= low) & (numbers <= high)
+    # Leading zeros, "+1", "1.0" ... would not survive a round trip
+    fits[fits] = numbers[fits].astype("int64").astype(str) == text[fits]
+    if not fits.all():
+        bad = text[~fits]
+        raise ValueError(
+            f"{table}.{values.name}: {len(bad)} values are not plain {dtype} IDs "
+            f"(e.g. {bad.unique()[:5].tolist()}); declare the ID domain as \"string\" "
+            f"in loaders_common.ID_DTYPES"
+        )
+
+    ids = pd.Series(pd.NA, index=values.index, dtype=dtype, name=values.name)
+    ids[present] = numbers.astype("int64")
+    return ids
+
+
+def compact_dtypes(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    """
+    Return df with the columns listed in TABLE_SCHEMAS[table] converted to
+    compact dtypes. Columns that are not present are skipped.
+    """
+    df = df.copy()
+    for col, kind in TABLE_SCHEMAS.get(table, {}).items():
+        if col not in df.columns:
+            continue
+        if isinstance(kind, tuple):
+            df[col] = _compact_id(df[col], ID_DTYPES[kind[1]], table)
+        else:
+            df[col] = df[col].astype(kind)
+    return df
+
+
+# SAP date columns are dd.mm.YYYY text; 31.12.9999 marks an open-ended interval.
+SAP_DATE_FORMAT = "%d.%m.%Y"
+SAP_OPEN_END_TEXT = "31.12.9999"
+
+# Open interval marker: the SAP sentinel itself. It is outside the
+# nanosecond datetime range, so parsed dates use microsecond resolution.
+OPEN_END_DATE = pd.Timestamp("9999-12-31")
+_DATE_DTYPE = "datetime64[us]"
+
+
+def parse_sap_dates(values: pd.Series, stats: dict = None) -> pd.Series:
+    """
+    Parse a column of SAP dd.mm.YYYY dates.
+
+    Date columns repeat a few thousand distinct values over millions of rows,
+    so only the unique values are parsed and the result is mapped back by
+    position. Surrounding whitespace is ignored, 31.12.9999 becomes
+    OPEN_END_DATE and anything unparseable becomes NaT.
+
+    This runs once per chunk under --chunk-rows, so it does not open a
+    profiling stage itself; if stats is given, its "date_rows",
+    "date_distinct" and "date_parse_s" counters are increased instead.
+    """
+    start = time.perf_counter()
+    codes, uniques = pd.factorize(values)
+    text = pd.Series(uniques, dtype=object).astype(str).str.strip()
+
+    parsed = pd.to_datetime(text, format=SAP_DATE_FORMAT, errors="coerce").astype(_DATE_DTYPE)
+    parsed[text == SAP_OPEN_END_TEXT] = OPEN_END_DATE
+
+    # Missing values have code -1, which picks the trailing NaT
+    lookup = np.append(parsed.to_numpy(), np.datetime64("NaT", "us"))
+    if stats is not None:
+        stats["date_rows"] = stats.get("date_rows", 0) + len(values)
+        stats["date_distinct"] = stats.get("date_distinct", 0) + len(uniques)
+        stats["date_parse_s"] = round(stats.get("date_parse_s", 0.0) + time.perf_counter() - start, 4)
+    return pd.Series(lookup[codes], index=values.index, name=values.name)
+
+
+def extract_varpole_id(values: pd.Series, type_code: str, stats: dict = None) -> pd.Series:
+    """
+    Extract the numeric object ID from SAP VarPole values such as "S 50001234"
+    (type code, optional padding, digits); same result as
+    values.str.extract(rf"{type_code}\\s*(\\d+)").
+
+    Values following that fixed layout are handled by slicing and a digit
+    check; only the remaining ones go through the regex. If stats is given,
+    its "rows" and "slow_rows" counters are increased.
+    """
+    text = values.str.strip()
+    rest = text.str.slice(len(type_code)).str.lstrip()
+    fast = (
+        text.str.startswith(type_code).fillna(False).astype(bool)
+        & rest.str.isdecimal().fillna(False).astype(bool)
+    )
+
+    ids = rest.where(fast)
+    slow = values.notna() & ~fast
+    slow_rows = int(slow.sum())
+    if slow_rows:
+        ids[slow] = values[slow].str.extract(rf"{type_code}\s*(\d+)", expand=False)
+
+    if stats is not None:
+        stats["rows"] = stats.get("rows", 0) + len(values)
+        stats["slow_rows"] = stats.get("slow_rows", 0) + slow_rows
+    return ids
+
+
+def report_varpole_stats(filename: str, type_code: str, stats: dict):
+    print(
+        f"{filename}: VarPole {type_code} IDs - {stats.get('slow_rows', 0)} of "
+        f"{stats.get('rows', 0)} rows needed the regex fallback"
+    )
+
+
+# Texts pandas.read_excel treats as missing values by default (the na_values
+# list in the read_excel documentation)
+_EXCEL_NA_VALUES = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None",
+    "n/a", "nan", "null",
+})
+
+
+def _excel_cell_text(cell):
+    """
+    Cell value as pd.read_excel(..., dtype=str) would return it
+    (None for missing values).
+    """
+    value = cell.value
+    if value is None or cell.data_type == "e":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value)
+    return None if text in _EXCEL_NA_VALUES else text
+
+
+def read_excel_columns(path: Path, columns, header: bool = True) -> pd.DataFrame:
+    """
+    Read only the given columns of the first sheet of an xlsx file as strings.
+
+    Equivalent to pd.read_excel(path, dtype=str)[columns] (column names
+    stripped), but the workbook is streamed row by row in openpyxl's
+    read-only mode and only the requested columns are kept in memory.
+
+    With header=True, columns are names looked up in the (whitespace-
+    stripped) first row; with header=False, they are 0-based positions and
+    every row is data. Raises ValueError if a column is not present.
+    """
+    with stage(f"read_excel:{Path(path).name}") as s:
+        df = _read_excel_columns(path, columns, header)
+        s.rows_out = len(df)
+    return df
+
+
+def _read_excel_columns(path: Path, columns, header: bool) -> pd.DataFrame:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows()
+
+        if header:
+            header_row = next(rows, ())
+            names = [
+                str(c.value).strip() if c.value is not None else None
+                for c in header_row
+            ]
+            positions = {}
+            for i, name in enumerate(names):
+                positions.setdefault(name, i)
+            available = [n for n in names if n is not None]
+        else:
+            positions = {}
+            available = None
+
+        missing = [c for c in columns if header and c not in positions]
+        if missing:
+            raise ValueError(
+                f"{path.name} is missing expected columns: {missing}. "
+                f"Available columns are: {available}"
+            )
+        indices = [positions[c] if header else c for c in columns]
+
+        data = [[] for _ in columns]
+        width = 0
+        last_with_data = -1
+        for row_number, row in enumerate(rows):
+            width = max(width, len(row))
+            for values, idx in zip(data, indices):
+                values.append(_excel_cell_text(row[idx]) if idx < len(row) else None)
+            # Like read_excel, drop trailing rows without any value
+            if any(c.value is not None and c.value != "" for c in row):
+                last_with_data = row_number
+    finally:
+        wb.close()
+
+    if not header:
+        missing = [c for c in columns if c >= width]
+        if missing:
+            raise ValueError(
+                f"{path.name} is missing expected columns: {missing}. "
+                f"Available columns are: {list(range(width))}"
+            )
+
+    return pd.DataFrame(
+        {
+            col: pd.Series(values[: last_with_data + 1], dtype=str)
+            for col, values in zip(columns, data)
+        }
+    )
@@ -1,8 +1,13 @@
 import pandas as pd
 from config import DATA_DIR
+from excel_cache import cached_excel_loader
+from loaders_common import compact_dtypes, parse_sap_dates, read_excel_columns
 
+DEGREED_FILE = "Degreed.xlsx"
 
-def load_degreed_learning() -> pd.DataFrame:
+
+@cached_excel_loader(DEGREED_FILE, version=3)
+def load_degreed_learning(compact: bool = False) -> pd.DataFrame:
     """
     Load Degreed learning completions from Degreed.xlsx.
 
@@ -37,11 +42,11 @@ def load_degreed_learning() -> pd.DataFrame:
     Note:
         - This assumes Degreed 'Employee ID' matches your SAP person_id.
           If not, you'll need a separate mapping table.
-    """
-    path = DATA_DIR / "Degreed.xlsx"
-    df = pd.read_excel(path, dtype=str)
-    df.columns = [c.strip() for c in df.columns]
 
+    With compact=True the ID and code columns get the compact dtypes from
+    loaders_common.TABLE_SCHEMAS["degreed_learning"].
+    """
+    path = DATA_DIR / DEGREED_FILE
     rename_map = {
         "Completed Date": "completed_date",
         "Employee ID": "person_id",
@@ -57,19 +62,13 @@ def load_degreed_learning() -> pd.DataFrame:
         "Estimated Learning Minutes": "estimated_minutes",
     }
 
-    missing_cols = [c for c in rename_map.keys() if c not in df.columns]
-    if missing_cols:
-        raise ValueError(
-            f"Degreed.xlsx is missing expected columns: {missing_cols}. "
-            f"Available columns are: {list(df.columns)}"
-        )
+    # Read only the mapped columns (ValueError if any of them is missing)
+    df = read_excel_columns(path, list(rename_map))
 
     df = df.rename(columns=rename_map)
 
     # Parse date
-    df["completed_date"] = pd.to_datetime(
-        df["completed_date"], format="%d.%m.%Y", errors="coerce"
-    )
+    df["completed_date"] = parse_sap_dates(df["completed_date"])
 
     # Strip text fields
     for col in [
@@ -88,7 +87,7 @@ def load_degreed_learning() -> pd.DataFrame:
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors="coerce")
 
-    return df[
+    degreed_learning = df[
         [
             "completed_date",
             "person_id",
@@ -103,4 +102,8 @@ def load_degreed_learning() -> pd.DataFrame:
             "verified_minutes",
             "estimated_minutes",
         ]
-    ]
\ No newline at end of file
+    ]
+    if compact:
+        degreed_learning = compact_dtypes(degreed_learning, "degreed_learning")
+
+    return degreed_learning
\ No newline at end of file
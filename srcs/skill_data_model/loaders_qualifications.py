@@ -1,8 +1,27 @@
 import pandas as pd
 from config import DATA_DIR
-
-
-def load_qualifications() -> pd.DataFrame:
+from excel_cache import cached_excel_loader
+from loaders_common import compact_dtypes, parse_sap_dates, read_excel_columns
+
+QUALIFICATIONS_FILE = "ZPE_KOM_KVAL.xlsx"
+QUALIFICATION_HISTORY_FILE = "ZHRPD_VZD_STA_016_RE_RHRHAZ00.xlsx"
+TRAINING_FILE = "ZHRPD_VZD_STA_007.xlsx"
+
+# Source columns each loader reads; all other columns are never materialized
+QUALIFICATIONS_COLUMNS = ["ID kvalifikace", "Kvalifikace", "Číslo FM"]
+QUALIFICATION_HISTORY_COLUMNS = ["ID P", "Počát.datum", "Koncové datum", "ID Q"]
+TRAINING_COLUMNS = [
+    "Typ akce",
+    "Označení typu akce",
+    "IDOBJ",
+    "Datum zahájení",
+    "Datum ukončení",
+    "ID účastníka",
+]
+
+
+@cached_excel_loader(QUALIFICATIONS_FILE, version=2)
+def load_qualifications(compact: bool = False) -> pd.DataFrame:
     """
     Load qualification catalogue from ZPE_KOM_KVAL.xlsx.
 
@@ -15,10 +34,12 @@ def load_qualifications() -> pd.DataFrame:
         - qualification_id
         - qualification_name
         - fm_number
+
+    With compact=True the ID and code columns get the compact dtypes from
+    loaders_common.TABLE_SCHEMAS["qualifications"].
     """
-    path = DATA_DIR / "ZPE_KOM_KVAL.xlsx"
-    df = pd.read_excel(path, dtype=str)
-    df.columns = [c.strip() for c in df.columns]
+    path = DATA_DIR / QUALIFICATIONS_FILE
+    df = read_excel_columns(path, QUALIFICATIONS_COLUMNS)
 
     df = df.rename(columns={
         "ID kvalifikace": "qualification_id",
@@ -28,10 +49,15 @@ def load_qualifications() -> pd.DataFrame:
 
     df["qualification_id"] = df["qualification_id"].astype(str).str.strip()
 
-    return df[["qualification_id", "qualification_name", "fm_number"]]
+    qualifications = df[["qualification_id", "qualification_name", "fm_number"]]
+    if compact:
+        qualifications = compact_dtypes(qualifications, "qualifications")
+
+    return qualifications
 
 
-def load_person_qualification_history() -> pd.DataFrame:
+@cached_excel_loader(QUALIFICATION_HISTORY_FILE, version=3)
+def load_person_qualification_history(compact: bool = False) -> pd.DataFrame:
     """
     Load person–qualification histories from ZHRPD_VZD_STA_016_RE_RHRHAZ00.xlsx.
 
@@ -47,21 +73,22 @@ def load_person_qualification_history() -> pd.DataFrame:
         - qualification_id
         - valid_from
         - valid_to
+
+    With compact=True the ID and code columns get the compact dtypes from
+    loaders_common.TABLE_SCHEMAS["person_qualification_history"].
     """
-    path = DATA_DIR / "ZHRPD_VZD_STA_016_RE_RHRHAZ00.xlsx"
-    df = pd.read_excel(path, dtype=str)
-    df.columns = [c.strip() for c in df.columns]
+    path = DATA_DIR / QUALIFICATION_HISTORY_FILE
+    df = read_excel_columns(path, QUALIFICATION_HISTORY_COLUMNS)
 
     df = df.rename(columns={
         "ID P": "person_id",
         "Počát.datum": "valid_from",
         "Koncové datum": "valid_to",
         "ID Q": "qualification_id",
-        "Název Q": "qualification_name_raw"
     })
 
     for col in ["valid_from", "valid_to"]:
-        df[col] = pd.to_datetime(df[col], format="%d.%m.%Y", errors="coerce")
+        df[col] = parse_sap_dates(df[col])
 
     df["person_id"] = df["person_id"].astype(str).str.strip()
     df["qualification_id"] = df["qualification_id"].astype(str).str.strip()
@@ -70,10 +97,16 @@ def load_person_qualification_history() -> pd.DataFrame:
         "person_id", "qualification_id", "valid_from", "valid_to"
     ]]
 
+    if compact:
+        person_qualification_history = compact_dtypes(
+            person_qualification_history, "person_qualification_history"
+        )
+
     return person_qualification_history
 
 
-def load_training_events_and_participation():
+@cached_excel_loader(TRAINING_FILE, version=3)
+def load_training_events_and_participation(compact: bool = False):
     """
     Load SAP training events and participation from ZHRPD_VZD_STA_007.xlsx.
 
@@ -98,10 +131,12 @@ def load_training_events_and_participation():
         - event_instance_id
         - start_date
         - end_date
+
+    With compact=True the ID and code columns get the compact dtypes from
+    loaders_common.TABLE_SCHEMAS["training_events"] / ["training_participation"].
     """
-    path = DATA_DIR / "ZHRPD_VZD_STA_007.xlsx"
-    df = pd.read_excel(path, dtype=str)
-    df.columns = [c.strip() for c in df.columns]
+    path = DATA_DIR / TRAINING_FILE
+    df = read_excel_columns(path, TRAINING_COLUMNS)
 
     # Unique event types (course types)
     training_events = df[["Typ akce", "Označení typu akce"]].drop_duplicates().rename(
@@ -113,10 +148,8 @@ def load_training_events_and_participation():
     training_events["event_type_id"] = training_events["event_type_id"].astype(str).str.strip()
 
     # Participation per session
-    df["start_date"] = pd.to_datetime(df["Datum zahájení"],
-                                      format="%d.%m.%Y", errors="coerce")
-    df["end_date"] = pd.to_datetime(df["Datum ukončení"],
-                                    format="%d.%m.%Y", errors="coerce")
+    df["start_date"] = parse_sap_dates(df["Datum zahájení"])
+    df["end_date"] = parse_sap_dates(df["Datum ukončení"])
 
     training_participation = df.rename(columns={
         "Typ akce": "event_type_id",
@@ -128,4 +161,8 @@ def load_training_events_and_participation():
     training_participation["event_type_id"] = training_participation["event_type_id"].astype(str).str.strip()
     training_participation["event_instance_id"] = training_participation["event_instance_id"].astype(str).str.strip()
 
+    if compact:
+        training_events = compact_dtypes(training_events, "training_events")
+        training_participation = compact_dtypes(training_participation, "training_participation")
+
     return training_events, training_participation
\ No newline at end of file
@@ -1,110 +1,281 @@
-import pandas as pd
+import io
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
-from io import StringIO
+
+import pandas as pd
 from config import DATA_DIR
+from instrumentation import stage
+from loaders_common import (
+    compact_dtypes,
+    extract_varpole_id,
+    parse_sap_dates,
+    report_varpole_stats,
+)
 
 # Encoding for SAP TXT exports
 SAP_ENCODING = "cp1250"  # change to "iso-8859-2" if characters look wrong
 
+# Bytes read from disk per chunk when streaming SAP TXT exports
+SAP_READ_CHUNK_SIZE = 1 << 20
 
-def _read_text_without_nuls(path: Path) -> StringIO:
+
+class _NulStrippingReader(io.RawIOBase):
     """
-    Read a text file, remove any NUL bytes, and return a StringIO buffer.
-    This lets pandas with engine='c' parse lines that originally contained NULs.
+    Binary reader over an open file that drops NUL bytes chunk by chunk.
+    SAP_ENCODING is a single-byte codepage, so removing b"\x00" before
+    decoding is the same as removing "\x00" after it.
     """
-    with open(path, "r", encoding=SAP_ENCODING, errors="replace") as f:
-        text = f.read()
-    text = text.replace("\x00", "")
-    return StringIO(text)
+
+    def __init__(self, raw, chunk_size: int):
+        self._raw = raw
+        self._chunk_size = chunk_size
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while True:
+            chunk = self._raw.read(min(len(b), self._chunk_size))
+            if not chunk:
+                return 0
+            chunk = chunk.replace(b"\x00", b"")
+            if chunk:
+                break
+        n = len(chunk)
+        b[:n] = chunk
+        return n
 
 
-def _find_header_row(path: Path, header_keywords=("VP", "ID obj.")):
+class _SapTextStream(io.TextIOBase):
     """
-    Find the index of the header row in an RHRHAZ00 text export
-    by searching for a line containing given keywords.
+    Text stream handed to pd.read_csv: yields the already consumed header
+    line first, then keeps pulling decoded chunks from the underlying file.
     """
-    with open(path, "r", encoding=SAP_ENCODING, errors="replace") as f:
-        lines = f.readlines()
 
-    for i, line in enumerate(lines):
-        if all(k in line for k in header_keywords):
-            return i
-    raise ValueError(f"Header row not found in {path}")
+    def __init__(self, header_line: str, text):
+        self._pending = header_line
+        self._text = text
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            out = self._pending + self._text.read()
+            self._pending = ""
+            return out
+        if self._pending:
+            out = self._pending[:size]
+            self._pending = self._pending[size:]
+            if len(out) < size:
+                out += self._text.read(size - len(out))
+            return out
+        return self._text.read(size)
+
+    def readline(self, size=-1):
+        if self._pending:
+            out = self._pending
+            self._pending = ""
+            return out
+        return self._text.readline(size)
+
+
+@contextmanager
+def _open_sap_export(path: Path, header_keywords=None):
+    """
+    Open an RHRHAZ00 / ZHRPD text export for a single streaming pass.
 
+    The file is read in SAP_READ_CHUNK_SIZE byte chunks, NUL bytes are
+    removed and the text is decoded from SAP_ENCODING on the fly. Lines
+    before the header row (the "Dynamische Listenausgabe" preamble) are
+    skipped; the header row is the first line containing all
+    header_keywords. With header_keywords=None the first line is the header.
 
-def load_rhrhaz00_ps(filename: str) -> pd.DataFrame:
-    """
-    Load Person–Position relationships (P_S file).
-    Returns: person_position_history DataFrame:
-      columns: person_id, position_id, valid_from, valid_to
+    Yields a text stream positioned at the header row.
     """
-    path = DATA_DIR / filename
-    header_idx = _find_header_row(path)
+    with open(path, "rb", buffering=0) as raw:
+        text = io.TextIOWrapper(
+            io.BufferedReader(
+                _NulStrippingReader(raw, SAP_READ_CHUNK_SIZE),
+                buffer_size=SAP_READ_CHUNK_SIZE,
+            ),
+            encoding=SAP_ENCODING,
+            errors="replace",
+        )
+        for line in text:
+            if header_keywords is None or all(k in line for k in header_keywords):
+                break
+        else:
+            raise ValueError(f"Header row not found in {path}")
 
-    buffer = _read_text_without_nuls(path)
+        yield _SapTextStream(line, text)
 
-    df = pd.read_csv(
-        buffer,
-        sep="\t",
-        header=0,
-        skiprows=header_idx,
-        dtype=str,
-        engine="c",
-    )
-    df.columns = [c.strip() for c in df.columns]
 
+def _read_sap_export(
+    path: Path,
+    header_keywords=("VP", "ID obj."),
+    usecols=None,
+    chunksize=None,
+    transform=None,
+    stats: dict = None,
+) -> pd.DataFrame:
+    """
+    Parse a tab-separated SAP text export into a DataFrame of strings,
+    reading the file only once (see _open_sap_export).
+
+    usecols limits parsing to these (whitespace-stripped) column names.
+    With chunksize, the file is parsed chunksize rows at a time and
+    transform is applied to each chunk before the chunks are concatenated,
+    so rows dropped by transform never take part in a full-file frame.
+    Without chunksize, transform is applied to the whole frame.
+
+    stats (a dict the transform fills, e.g. with parse_sap_dates counters)
+    is added to the profiling record of the parse, so per-chunk work is
+    reported once per file.
+    """
+    if usecols is not None:
+        wanted = set(usecols)
+        usecols = lambda c: c.strip() in wanted  # noqa: E731
+    if transform is None:
+        transform = lambda df: df  # noqa: E731
+
+    with stage(f"parse_sap:{path.name}") as s, _open_sap_export(path, header_keywords) as stream:
+        reader = pd.read_csv(
+            stream,
+            sep="\t",
+            header=0,
+            dtype=str,
+            engine="c",
+            usecols=usecols,
+            chunksize=chunksize,
+        )
+        chunks = [reader] if chunksize is None else reader
+        parts = []
+        rows_in = 0
+        for df in chunks:
+            rows_in += len(df)
+            df.columns = [c.strip() for c in df.columns]
+            parts.append(transform(df))
+        s.rows_in = rows_in
+        s.rows_out = sum(len(part) for part in parts)
+        if stats:
+            s.extra.update(stats)
+
+    if len(parts) == 1:
+        return parts[0]
+    # Chunks keep their row numbers, so the result matches a single-pass parse
+    return pd.concat(parts)
+
+
+def _person_positions(df: pd.DataFrame, stats: dict = None, date_stats: dict = None) -> pd.DataFrame:
+    """
+    P_S rows (whole file or one chunk) -> person_id, position_id, valid_from, valid_to
+    """
     # Filter for object type P
     df = df[df["TO"].str.strip() == "P"].copy()
 
     df["person_id"] = df["ID obj."].str.strip()
-    df["position_id"] = df["VarPole"].str.extract(r"S\s*(\d+)", expand=False)
+    df["position_id"] = extract_varpole_id(df["VarPole"], "S", stats)
 
     for col in ["Začátek", "Konec"]:
-        df[col] = pd.to_datetime(df[col].str.strip(), format="%d.%m.%Y", errors="coerce")
+        df[col] = parse_sap_dates(df[col], date_stats)
 
     person_position_history = df[["person_id", "position_id", "Začátek", "Konec"]].rename(
         columns={"Začátek": "valid_from", "Konec": "valid_to"}
     )
-    person_position_history = person_position_history.dropna(subset=["position_id"])
-
-    return person_position_history
+    return person_position_history.dropna(subset=["position_id"])
 
 
-def load_rhrhaz00_st(filename: str) -> pd.DataFrame:
+def _position_tasks(df: pd.DataFrame, stats: dict = None, date_stats: dict = None) -> pd.DataFrame:
     """
-    Load Position–Task relationships (S_T file).
-    Returns: position_tasks DataFrame:
-      columns: position_id, task_id, valid_from, valid_to
+    S_T rows (whole file or one chunk) -> position_id, task_id, valid_from, valid_to
     """
-    path = DATA_DIR / filename
-    buffer = _read_text_without_nuls(path)
-
-    df = pd.read_csv(
-        buffer,
-        sep="\t",
-        header=0,
-        dtype=str,
-        engine="c",
-    )
-    df.columns = [c.strip() for c in df.columns]
-
     df = df[df["TO"].str.strip() == "S"].copy()
 
     df["position_id"] = df["ID obj."].str.strip()
-    df["task_id"] = df["VarPole"].str.extract(r"T\s*(\d+)", expand=False)
+    df["task_id"] = extract_varpole_id(df["VarPole"], "T", stats)
 
     for col in ["Začátek", "Konec"]:
-        df[col] = pd.to_datetime(df[col].str.strip(), format="%d.%m.%Y", errors="coerce")
+        df[col] = parse_sap_dates(df[col], date_stats)
 
     position_tasks = df[["position_id", "task_id", "Začátek", "Konec"]].rename(
         columns={"Začátek": "valid_from", "Konec": "valid_to"}
     )
-    position_tasks = position_tasks.dropna(subset=["task_id"])
+    return position_tasks.dropna(subset=["task_id"])
+
+
+# Columns of the P_S / S_T exports the loaders use
+_RELATION_COLUMNS = ["TO", "ID obj.", "VarPole", "Začátek", "Konec"]
+
+
+def load_rhrhaz00_ps(filename: str, compact: bool = False, chunksize: int = None) -> pd.DataFrame:
+    """
+    Load Person–Position relationships (P_S file).
+    Returns: person_position_history DataFrame:
+      columns: person_id, position_id, valid_from, valid_to
+
+    With chunksize, the file is parsed that many rows at a time and each
+    chunk is filtered and reduced before the chunks are combined, so files
+    larger than memory can be loaded.
+
+    With compact=True the ID and code columns get the compact dtypes from
+    loaders_common.TABLE_SCHEMAS["person_position_history"].
+    """
+    path = DATA_DIR / filename
+    varpole_stats = {}
+    date_stats = {}
+    person_position_history = _read_sap_export(
+        path,
+        usecols=_RELATION_COLUMNS,
+        chunksize=chunksize,
+        transform=partial(_person_positions, stats=varpole_stats, date_stats=date_stats),
+        stats=date_stats,
+    )
+    report_varpole_stats(filename, "S", varpole_stats)
+
+    if compact:
+        person_position_history = compact_dtypes(person_position_history, "person_position_history")
+
+    return person_position_history
+
+
+def load_rhrhaz00_st(filename: str, compact: bool = False, chunksize: int = None) -> pd.DataFrame:
+    """
+    Load Position–Task relationships (S_T file).
+    Returns: position_tasks DataFrame:
+      columns: position_id, task_id, valid_from, valid_to
+
+    chunksize works as in load_rhrhaz00_ps.
+
+    With compact=True the ID and code columns get the compact dtypes from
+    loaders_common.TABLE_SCHEMAS["position_tasks"].
+    """
+    path = DATA_DIR / filename
+    # The S_T export has no preamble: the header is the first line.
+    varpole_stats = {}
+    date_stats = {}
+    position_tasks = _read_sap_export(
+        path,
+        header_keywords=None,
+        usecols=_RELATION_COLUMNS,
+        chunksize=chunksize,
+        transform=partial(_position_tasks, stats=varpole_stats, date_stats=date_stats),
+        stats=date_stats,
+    )
+    report_varpole_stats(filename, "T", varpole_stats)
+
+    if compact:
+        position_tasks = compact_dtypes(position_tasks, "position_tasks")
 
     return position_tasks
 
 
-def load_rhrhaz00_t_z(filename: str, z_type: str) -> pd.DataFrame:
+# Loaders that accept chunksize (main.py --chunk-rows)
+CHUNKED_LOADERS = (load_rhrhaz00_ps, load_rhrhaz00_st)
+
+
+def load_rhrhaz00_t_z(filename: str, z_type: str, compact: bool = False) -> pd.DataFrame:
     """
     Load Task–ZP/ZS/ZX relationships (T_ZP, T_ZS, T_ZX files).
 
@@ -112,27 +283,21 @@ def load_rhrhaz00_t_z(filename: str, z_type: str) -> pd.DataFrame:
     lines. We first find the header row, then read from there.
 
     Returns: DataFrame with columns: task_id, z_id, z_type
+
+    compact is accepted like by the other loaders; the parts are concatenated
+    and then compacted in assemble_rhrhaz00_tables, so that they share one
+    dtype per column.
     """
     path = DATA_DIR / filename
-    header_idx = _find_header_row(path)
-    buffer = _read_text_without_nuls(path)
-
-    df = pd.read_csv(
-        buffer,
-        sep="\t",
-        header=0,
-        skiprows=header_idx,
-        dtype=str,
-        engine="c",
-    )
-    df.columns = [c.strip() for c in df.columns]
+    df = _read_sap_export(path)
 
     # Keep only T as "from" object type
     df = df[df["TO"].str.strip() == "T"].copy()
     df["task_id"] = df["ID obj."].str.strip()
 
-    pattern = rf"{z_type}\s*(\d+)"
-    df["z_id"] = df["VarPole"].str.extract(pattern, expand=False)
+    varpole_stats = {}
+    df["z_id"] = extract_varpole_id(df["VarPole"], z_type, varpole_stats)
+    report_varpole_stats(filename, z_type, varpole_stats)
 
     links = df[["task_id", "z_id"]].dropna(subset=["z_id"]).copy()
     links["z_type"] = z_type
@@ -140,45 +305,23 @@ def load_rhrhaz00_t_z(filename: str, z_type: str) -> pd.DataFrame:
     return links
 
 
-def load_zhrpd_descr_zp(filename: str, lang_code: str) -> pd.DataFrame:
+def load_zhrpd_descr_zp(filename: str, lang_code: str, compact: bool = False) -> pd.DataFrame:
     """
     Load ZP descriptions from ZHRPD_DESCR_EXPORT_* (CS/DE/EN) TXT files.
 
     These are tab-separated text exports, not Excel.
 
     Returns: DataFrame with columns: z_type, z_id, lang, text
+
+    compact is accepted like by the other loaders; the parts are concatenated
+    and then compacted in assemble_rhrhaz00_tables, so that they share one
+    dtype per column.
     """
     path = DATA_DIR / filename
 
     # The file has some header lines ("Dynamische Listenausgabe", etc.)
     # and then a header row containing "Var.plánu", "Typ obj.", etc.
-    # We'll find the header row first.
-    header_idx = None
-    with open(path, "r", encoding=SAP_ENCODING, errors="replace") as f:
-        lines = f.readlines()
-        for i, line in enumerate(lines):
-            if "Var.plánu" in line and "Typ obj." in line:
-                header_idx = i
-                break
-
-    if header_idx is None:
-        raise ValueError(f"Header row not found in {path}")
-
-    # Remove NULs and read with pandas
-    from io import StringIO
-    text = "".join(lines)
-    text = text.replace("\x00", "")
-    buffer = StringIO(text)
-
-    df = pd.read_csv(
-        buffer,
-        sep="\t",
-        header=0,
-        skiprows=header_idx,
-        dtype=str,
-        engine="c",
-    )
-    df.columns = [c.strip() for c in df.columns]
+    df = _read_sap_export(path, header_keywords=("Var.plánu", "Typ obj."))
 
     # Filter for ZP object type
     df = df[df["Typ obj."].str.strip() == "ZP"].copy()
@@ -191,24 +334,17 @@ def load_zhrpd_descr_zp(filename: str, lang_code: str) -> pd.DataFrame:
     return df[["z_type", "z_id", "lang", "text"]]
 
 
-def load_rhrhaz00_z_master(filename: str, z_type: str) -> pd.DataFrame:
+def load_rhrhaz00_z_master(filename: str, z_type: str, compact: bool = False) -> pd.DataFrame:
     """
     Load ZS or ZX descriptions from RHRHAZ00_ZS / RHRHAZ00_ZX.
     Returns: DataFrame with columns: z_type, z_id, lang, text
+
+    compact is accepted like by the other loaders; the parts are concatenated
+    and then compacted in assemble_rhrhaz00_tables, so that they share one
+    dtype per column.
     """
     path = DATA_DIR / filename
-    header_idx = _find_header_row(path)
-    buffer = _read_text_without_nuls(path)
-
-    df = pd.read_csv(
-        buffer,
-        sep="\t",
-        header=0,
-        skiprows=header_idx,
-        dtype=str,
-        engine="c",
-    )
-    df.columns = [c.strip() for c in df.columns]
+    df = _read_sap_export(path)
 
     df = df[df["TO"].str.strip() == z_type].copy()
     df["z_type"] = z_type
@@ -220,78 +356,117 @@ def load_rhrhaz00_z_master(filename: str, z_type: str) -> pd.DataFrame:
     return df[["z_type", "z_id", "lang", "text"]]
 
 
-def build_rhrhaz00_tables():
-    """
-    Convenience function to load all RHRHAZ00-related tables and return them
-    in a dictionary.
-    """
+# One entry per file parse: name -> (loader, args).
+# Every entry is independent of the others, so they can run in any order
+# or concurrently (see main.py --workers).
+RHRHAZ00_TASKS = {
     # Person–Position
-    person_position_history = load_rhrhaz00_ps(
-        "250827_Export_AI_Skill_Coatch_RE_RHRHAZ00_P_S.txt"
-    )
-
-    # Dimensions
-    persons = (
-        person_position_history[["person_id"]]
-        .drop_duplicates()
-        .reset_index(drop=True)
-    )
-    positions = (
-        person_position_history[["position_id"]]
-        .drop_duplicates()
-        .reset_index(drop=True)
-    )
-
+    "person_position_history": (
+        load_rhrhaz00_ps,
+        ("250827_Export_AI_Skill_Coatch_RE_RHRHAZ00_P_S.txt",),
+    ),
     # Position–Task
-    position_tasks = load_rhrhaz00_st(
-        "250828_Export_AI_Skill_Coatch_RE_RHRHAZ00_S_T.txt"
-    )
-
+    "position_tasks": (
+        load_rhrhaz00_st,
+        ("250828_Export_AI_Skill_Coatch_RE_RHRHAZ00_S_T.txt",),
+    ),
     # Task–Z links
-    task_zp_links = load_rhrhaz00_t_z(
-        "250828_Export_AI_Skill_Coatch_RE_RHRHAZ00_T_ZP.txt", "ZP"
-    )
-    task_zs_links = load_rhrhaz00_t_z(
-        "250828_Export_AI_Skill_Coatch_RE_RHRHAZ00_T_ZS.txt", "ZS"
-    )
-    task_zx_links = load_rhrhaz00_t_z(
-        "250828_Export_AI_Skill_Coatch_RE_RHRHAZ00_T_ZX.txt", "ZX"
-    )
-    task_z_links = pd.concat(
-        [task_zp_links, task_zs_links, task_zx_links],
-        ignore_index=True,
-    )
-
+    "task_zp_links": (
+        load_rhrhaz00_t_z,
+        ("250828_Export_AI_Skill_Coatch_RE_RHRHAZ00_T_ZP.txt", "ZP"),
+    ),
+    "task_zs_links": (
+        load_rhrhaz00_t_z,
+        ("250828_Export_AI_Skill_Coatch_RE_RHRHAZ00_T_ZS.txt", "ZS"),
+    ),
+    "task_zx_links": (
+        load_rhrhaz00_t_z,
+        ("250828_Export_AI_Skill_Coatch_RE_RHRHAZ00_T_ZX.txt", "ZX"),
+    ),
     # ZP descriptions from ZHRPD exports
-    zp_cs = load_zhrpd_descr_zp(
-        "250828_Export_AI_Skill_Coatch_ZHRPD_DESCR_EXPORT_CS.txt", "CS"
-    )
-    zp_de = load_zhrpd_descr_zp(
-        "250828_Export_AI_Skill_Coatch_ZHRPD_DESCR_EXPORT_DE.txt", "DE"
-    )
-    zp_en = load_zhrpd_descr_zp(
-        "250828_Export_AI_Skill_Coatch_ZHRPD_DESCR_EXPORT_EN.txt", "EN"
-    )
-    z_descr_zp = pd.concat([zp_cs, zp_de, zp_en], ignore_index=True)
-
+    "zp_cs": (
+        load_zhrpd_descr_zp,
+        ("250828_Export_AI_Skill_Coatch_ZHRPD_DESCR_EXPORT_CS.txt", "CS"),
+    ),
+    "zp_de": (
+        load_zhrpd_descr_zp,
+        ("250828_Export_AI_Skill_Coatch_ZHRPD_DESCR_EXPORT_DE.txt", "DE"),
+    ),
+    "zp_en": (
+        load_zhrpd_descr_zp,
+        ("250828_Export_AI_Skill_Coatch_ZHRPD_DESCR_EXPORT_EN.txt", "EN"),
+    ),
     # ZS / ZX descriptions from RHRHAZ00
-    zs_master = load_rhrhaz00_z_master(
-        "250828_Export_AI_Skill_Coatch_RE_RHRHAZ00_ZS.txt", "ZS"
-    )
-    zx_master = load_rhrhaz00_z_master(
-        "250828_Export_AI_Skill_Coatch_RE_RHRHAZ00_ZX.txt", "ZX"
-    )
-
-    z_descriptions = pd.concat(
-        [z_descr_zp, zs_master, zx_master],
-        ignore_index=True,
-    )
+    "zs_master": (
+        load_rhrhaz00_z_master,
+        ("250828_Export_AI_Skill_Coatch_RE_RHRHAZ00_ZS.txt", "ZS"),
+    ),
+    "zx_master": (
+        load_rhrhaz00_z_master,
+        ("250828_Export_AI_Skill_Coatch_RE_RHRHAZ00_ZX.txt", "ZX"),
+    ),
+}
+
+
+def assemble_rhrhaz00_tables(parts: dict, compact: bool = False) -> dict:
+    """
+    Combine the results of RHRHAZ00_TASKS (keyed by task name) into the
+    RHRHAZ00 tables. Tables whose parts are not all present are left out,
+    so a subset of the tasks can be re-run on its own.
 
-    return {
-        "persons": persons,
-        "positions": positions,
-        "person_position_history": person_position_history,
-        "position_tasks": position_tasks,
-        "task_z_links": task_z_links,
-        "z_descriptions": z_descriptions,
-    }
\ No newline at end of file
+    With compact=True the concatenated task_z_links and z_descriptions get
+    the compact dtypes from loaders_common.TABLE_SCHEMAS (the single-file
+    tables are compacted by their loaders).
+    """
+    tables = {}
+
+    if "person_position_history" in parts:
+        person_position_history = parts["person_position_history"]
+
+        # Dimensions
+        tables["persons"] = (
+            person_position_history[["person_id"]]
+            .drop_duplicates()
+            .reset_index(drop=True)
+        )
+        tables["positions"] = (
+            person_position_history[["position_id"]]
+            .drop_duplicates()
+            .reset_index(drop=True)
+        )
+        tables["person_position_history"] = person_position_history
+
+    if "position_tasks" in parts:
+        tables["position_tasks"] = parts["position_tasks"]
+
+    link_parts = ["task_zp_links", "task_zs_links", "task_zx_links"]
+    if all(name in parts for name in link_parts):
+        tables["task_z_links"] = pd.concat(
+            [parts[name] for name in link_parts],
+            ignore_index=True,
+        )
+        if compact:
+            tables["task_z_links"] = compact_dtypes(tables["task_z_links"], "task_z_links")
+
+    descr_parts = ["zp_cs", "zp_de", "zp_en", "zs_master", "zx_master"]
+    if all(name in parts for name in descr_parts):
+        tables["z_descriptions"] = pd.concat(
+            [parts[name] for name in descr_parts],
+            ignore_index=True,
+        )
+        if compact:
+            tables["z_descriptions"] = compact_dtypes(tables["z_descriptions"], "z_descriptions")
+
+    return tables
+
+
+def build_rhrhaz00_tables(compact: bool = False):
+    """
+    Convenience function to load all RHRHAZ00-related tables and return them
+    in a dictionary.
+    """
+    parts = {
+        name: loader(*args, compact=compact)
+        for name, (loader, args) in RHRHAZ00_TASKS.items()
+    }
+    return assemble_rhrhaz00_tables(parts, compact)
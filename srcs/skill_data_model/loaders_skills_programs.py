@@ -1,8 +1,14 @@
 import pandas as pd
 from config import DATA_DIR
+from excel_cache import cached_excel_loader
+from loaders_common import compact_dtypes, parse_sap_dates, read_excel_columns
 
+SKILL_MAPPING_FILE = "Skill_mapping.xlsx"
+PROGRAMS_SE_FILE = "ERP_SK1.Start_month - SE.xlsx"
 
-def load_skill_mapping() -> pd.DataFrame:
+
+@cached_excel_loader(SKILL_MAPPING_FILE, version=2)
+def load_skill_mapping(compact: bool = False) -> pd.DataFrame:
     """
     Load mapping between internal courses and skills from Skill_mapping.xlsx.
 
@@ -30,11 +36,11 @@ def load_skill_mapping() -> pd.DataFrame:
         - valid_to
         - skill_name
         - category
-    """
-    path = DATA_DIR / "Skill_mapping.xlsx"
-    df = pd.read_excel(path, dtype=str)
-    df.columns = [c.strip() for c in df.columns]
 
+    With compact=True the ID and code columns get the compact dtypes from
+    loaders_common.TABLE_SCHEMAS["skill_mapping"].
+    """
+    path = DATA_DIR / SKILL_MAPPING_FILE
     rename_map = {
         "ID Kurzu": "course_id",
         "Zkratka D": "course_code",
@@ -48,12 +54,8 @@ def load_skill_mapping() -> pd.DataFrame:
         "Kategorie": "category",
     }
 
-    missing_cols = [c for c in rename_map.keys() if c not in df.columns]
-    if missing_cols:
-        raise ValueError(
-            f"Skill_mapping.xlsx is missing expected columns: {missing_cols}. "
-            f"Available columns are: {list(df.columns)}"
-        )
+    # Read only the mapped columns (ValueError if any of them is missing)
+    df = read_excel_columns(path, list(rename_map))
 
     df = df.rename(columns=rename_map)
 
@@ -72,9 +74,9 @@ def load_skill_mapping() -> pd.DataFrame:
 
     # Parse dates
     for col in ["valid_from", "valid_to"]:
-        df[col] = pd.to_datetime(df[col], format="%d.%m.%Y", errors="coerce")
+        df[col] = parse_sap_dates(df[col])
 
-    return df[
+    skill_mapping = df[
         [
             "course_id",
             "course_code",
@@ -88,9 +90,14 @@ def load_skill_mapping() -> pd.DataFrame:
             "category",
         ]
     ]
+    if compact:
+        skill_mapping = compact_dtypes(skill_mapping, "skill_mapping")
+
+    return skill_mapping
 
 
-def load_programs_se() -> pd.DataFrame:
+@cached_excel_loader(PROGRAMS_SE_FILE, version=2)
+def load_programs_se(compact: bool = False) -> pd.DataFrame:
     """
     Load program / curriculum definitions from ERP_SK1.Start_month - SE.xlsx.
 
@@ -105,9 +112,9 @@ def load_programs_se() -> pd.DataFrame:
 
     Two likely cases:
         A) The file has NO header row (only data):
-            - We read with header=None and assign names manually.
+            - We read with header=False and assign names manually.
         B) The file HAS a header row:
-            - Replace header=None with header=0 and adjust rename_map.
+            - Replace header=False with header=True and adjust rename_map.
 
     Current implementation assumes NO header and 5 columns:
         0: program_id
@@ -122,20 +129,23 @@ def load_programs_se() -> pd.DataFrame:
         - program_code
         - program_name_cs
         - program_name_intl
-    """
-    path = DATA_DIR / "ERP_SK1.Start_month - SE.xlsx"
-
-    # If your file DOES have headers, change header=None to header=0
-    # and adjust the rename_map below to match.
-    df = pd.read_excel(path, header=None, dtype=str)
 
-    # Ensure at least 5 columns exist
-    if df.shape[1] < 5:
+    With compact=True the ID and code columns get the compact dtypes from
+    loaders_common.TABLE_SCHEMAS["programs"].
+    """
+    path = DATA_DIR / PROGRAMS_SE_FILE
+
+    # If your file DOES have headers, change header=False to header=True,
+    # read the columns by name and adjust the rename_map below to match.
+    try:
+        df = read_excel_columns(path, [0, 1, 2, 3, 4], header=False)
+    except ValueError as e:
+        # Ensure at least 5 columns exist
         raise ValueError(
-            f"ERP_SK1.Start_month - SE.xlsx has {df.shape[1]} columns; "
+            f"ERP_SK1.Start_month - SE.xlsx has fewer than 5 columns; "
             f"this loader expects at least 5. Please open the file and "
             f"adjust load_programs_se() accordingly."
-        )
+        ) from e
 
     df = df.rename(
         columns={
@@ -162,10 +172,13 @@ def load_programs_se() -> pd.DataFrame:
         ]
     ]
 
+    if compact:
+        programs = compact_dtypes(programs, "programs")
+
     return programs
 
 
-def build_skills_programs_tables():
+def build_skills_programs_tables(compact: bool = False):
     """
     Convenience function to load both:
         - skill_mapping
@@ -177,8 +190,8 @@ def build_skills_programs_tables():
             'programs': <DataFrame>
         }
     """
-    skill_mapping = load_skill_mapping()
-    programs = load_programs_se()
+    skill_mapping = load_skill_mapping(compact=compact)
+    programs = load_programs_se(compact=compact)
 
     return {
         "skill_mapping": skill_mapping,
@@ -1,16 +1,192 @@
+import argparse
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 
-from config import OUTPUT_DIR, BASE_DIR
+from config import OUTPUT_DIR, BASE_DIR, INGEST_WORKERS, OUTPUT_FORMAT
 
-from loaders_rhrhaz00 import build_rhrhaz00_tables
+import excel_cache
+import instrumentation
+from instrumentation import stage
+from ingest_manifest import changed_sources, load_manifest, save_manifest
+from table_io import TABLE_FORMATS, find_table, read_table, table_path, write_table
+from table_store import DEFAULT_DB_PATH, missing_tables, write_sqlite
+from role_graph import DEFAULT_GRAPH_DIR, GRAPH_TABLES, compile_role_graph
+from loaders_rhrhaz00 import CHUNKED_LOADERS, RHRHAZ00_TASKS, assemble_rhrhaz00_tables
 from loaders_qualifications import (
+    QUALIFICATIONS_FILE,
+    QUALIFICATION_HISTORY_FILE,
+    TRAINING_FILE,
     load_qualifications,
     load_person_qualification_history,
     load_training_events_and_participation,
 )
-from loaders_skills_programs import build_skills_programs_tables
-from loaders_degreed import load_degreed_learning
+from loaders_skills_programs import (
+    PROGRAMS_SE_FILE,
+    SKILL_MAPPING_FILE,
+    load_skill_mapping,
+    load_programs_se,
+)
+from loaders_degreed import DEGREED_FILE, load_degreed_learning
+
+
+# Default --profile report
+DEFAULT_PROFILE_PATH = OUTPUT_DIR / "profile_main.json"
+
+# Every file parse of the ingest as its own task: name -> (loader, args).
+# None of them depends on another one.
+INGEST_TASKS = {
+    # 1) RHRHAZ00-based tables: persons, positions, tasks, ZP/ZS/ZX descriptions
+    **RHRHAZ00_TASKS,
+    # 2) Qualifications and SAP training
+    "qualifications": (load_qualifications, ()),
+    "person_qualification_history": (load_person_qualification_history, ()),
+    "training": (load_training_events_and_participation, ()),
+    # 3) Skill mapping and programs
+    "skill_mapping": (load_skill_mapping, ()),
+    "programs": (load_programs_se, ()),
+    # 4) Degreed learning completions
+    "degreed_learning": (load_degreed_learning, ()),
+}
+
+
+# Ingest task -> source file in DATA_DIR it parses
+TASK_SOURCES = {
+    # RHRHAZ00 / ZHRPD loaders take the file name as first argument
+    **{name: args[0] for name, (_loader, args) in RHRHAZ00_TASKS.items()},
+    "qualifications": QUALIFICATIONS_FILE,
+    "person_qualification_history": QUALIFICATION_HISTORY_FILE,
+    "training": TRAINING_FILE,
+    "skill_mapping": SKILL_MAPPING_FILE,
+    "programs": PROGRAMS_SE_FILE,
+    "degreed_learning": DEGREED_FILE,
+}
+
+# Output table -> ingest tasks it is built from
+TABLE_TASKS = {
+    # RHRHAZ00
+    "persons": ["person_position_history"],
+    "positions": ["person_position_history"],
+    "person_position_history": ["person_position_history"],
+    "position_tasks": ["position_tasks"],
+    "task_z_links": ["task_zp_links", "task_zs_links", "task_zx_links"],
+    "z_descriptions": ["zp_cs", "zp_de", "zp_en", "zs_master", "zx_master"],
+    # Qualifications & training
+    "qualifications": ["qualifications"],
+    "person_qualification_history": ["person_qualification_history"],
+    "training_events": ["training"],
+    "training_participation": ["training"],
+    # Skills & programs
+    "skill_mapping": ["skill_mapping"],
+    "programs": ["programs"],
+    # Degreed
+    "degreed_learning": ["degreed_learning"],
+    # Note: we are not writing strategy_skill_mapping to CSV; it is JSON-based.
+}
+
+
+def run_ingest_tasks(
+    workers: int = 1, task_names=None, compact: bool = False, chunk_rows: int = None
+) -> dict:
+    """
+    Run INGEST_TASKS (all of them, or only task_names) and return their
+    results keyed by task name. compact=True is passed on to the loaders
+    (see loaders_common.TABLE_SCHEMAS), chunk_rows to the loaders that can
+    parse their file in chunks (CHUNKED_LOADERS).
+
+    With workers > 1 every task is submitted to a process pool of that size,
+    so the wall-clock time approaches the slowest single file instead of the
+    sum of all files. With workers <= 1 the tasks run one after another in
+    this process.
+    """
+    tasks = {}
+    for name, (loader, args) in INGEST_TASKS.items():
+        if task_names is not None and name not in task_names:
+            continue
+        options = {"compact": compact}
+        if chunk_rows and loader in CHUNKED_LOADERS:
+            options["chunksize"] = chunk_rows
+        tasks[name] = (partial(loader, **options), args)
+
+    if workers <= 1:
+        return {name: _run_task(name, loader, args) for name, (loader, args) in tasks.items()}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            name: executor.submit(_run_task_in_worker, name, loader, args)
+            for name, (loader, args) in tasks.items()
+        }
+        results = {}
+        for name, future in futures.items():
+            results[name], records = future.result()
+            instrumentation.add_records(records)
+        return results
+
+
+def _run_task(name: str, loader, args):
+    with stage(f"load:{name}") as s:
+        result = loader(*args)
+        s.rows_out = len(result) if not isinstance(result, tuple) else sum(map(len, result))
+        s.extra["source"] = TASK_SOURCES[name]
+    return result
+
+
+def _run_task_in_worker(name: str, loader, args):
+    """
+    _run_task in a worker process; also returns the worker's stage records.
+    """
+    result = _run_task(name, loader, args)
+    return result, instrumentation.collect()
+
+
+def build_tables(
+    workers: int = 1, table_names=None, compact: bool = False, chunk_rows: int = None
+) -> dict:
+    """
+    Load the source files and return the output tables keyed by table name.
+    With table_names, only the tasks feeding those tables are run and only
+    those tables are returned.
+    """
+    if table_names is None:
+        table_names = list(TABLE_TASKS)
+    task_names = {task for name in table_names for task in TABLE_TASKS[name]}
+
+    results = run_ingest_tasks(workers, task_names, compact, chunk_rows)
+
+    tables = assemble_rhrhaz00_tables(results, compact)
+    if "training" in results:
+        tables["training_events"], tables["training_participation"] = results["training"]
+    for name in ["qualifications", "person_qualification_history",
+                 "skill_mapping", "programs", "degreed_learning"]:
+        if name in results:
+            tables[name] = results[name]
+
+    # Keep the TABLE_TASKS order
+    return {name: tables[name] for name in TABLE_TASKS if name in table_names}
+
+
+def plan_incremental(manifest: dict, fmt: str, compact: bool = False):
+    """
+    Decide which output tables an incremental run has to rebuild.
+
+    A table is rebuilt if any source file feeding it changed since the
+    manifest was written, if its output file is missing, or if the output
+    format or dtype mode differs from the previous run.
+
+    Returns (table_names, changed_sources).
+    """
+    changed = changed_sources(manifest, sorted(set(TASK_SOURCES.values())))
+    if manifest.get("format") != fmt or manifest.get("compact", False) != compact:
+        return list(TABLE_TASKS), changed
+
+    table_names = []
+    for name, tasks in TABLE_TASKS.items():
+        sources = {TASK_SOURCES[task] for task in tasks}
+        if sources & changed.keys() or not table_path(name, fmt).exists():
+            table_names.append(name)
+    return table_names, changed
 
 
 def load_strategy_skill_mapping(mapping_filename: str = "strategy_skill_mapping.json"):
@@ -56,51 +232,163 @@ def load_strategy_skill_mapping(mapping_filename: str = "strategy_skill_mapping.
     return mapping_obj
 
 
-def main():
-    # 1) RHRHAZ00-based tables: persons, positions, tasks, ZP/ZS/ZX descriptions
-    rhr_tables = build_rhrhaz00_tables()
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convert the raw SAP / Degreed exports in data/ into output tables."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=INGEST_WORKERS,
+        help="Number of processes used to parse the source files "
+        "(default: %(default)s, 1 = sequential).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Parse every xlsx source again instead of using the Excel cache.",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Drop all cached xlsx parses before loading.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=sorted(TABLE_FORMATS),
+        default=OUTPUT_FORMAT,
+        help="File format of the output tables (default: %(default)s). "
+        "parquet / feather are compressed and keep column dtypes.",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Store numeric IDs as integers and codes as categoricals "
+        "(keep them with --format parquet / feather).",
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=None,
+        help="Parse the P_S and S_T exports this many rows at a time, "
+        "filtering each chunk before combining them (for files larger than memory).",
+    )
+    parser.add_argument(
+        "--sqlite",
+        nargs="?",
+        type=Path,
+        const=DEFAULT_DB_PATH,
+        default=None,
+        metavar="DB_PATH",
+        help="Also load the tables into an indexed SQLite database "
+        f"(default path: output/{DEFAULT_DB_PATH.name}); query it with store_queries.py.",
+    )
+    parser.add_argument(
+        "--graph",
+        action="store_true",
+        help="Also compile the person/position/task/competency graph "
+        f"(output/{DEFAULT_GRAPH_DIR.name}/) used by role_graph.RoleGraph.",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        type=Path,
+        const=DEFAULT_PROFILE_PATH,
+        default=None,
+        metavar="REPORT",
+        help="Record wall/CPU time, peak RSS and row counts of every loader, parse and "
+        f"write, print a summary and save a JSON report (default: output/{DEFAULT_PROFILE_PATH.name}).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only rebuild tables whose source files changed since the last run "
+        "(according to output/ingest_manifest.json).",
+    )
+    return parser.parse_args(argv)
 
-    # 2) Qualifications and SAP training
-    qualifications = load_qualifications()
-    person_qualification_history = load_person_qualification_history()
-    training_events, training_participation = load_training_events_and_participation()
 
-    # 3) Skill mapping and programs
-    skills_programs = build_skills_programs_tables()
-    skill_mapping = skills_programs["skill_mapping"]
-    programs = skills_programs["programs"]
+def main(argv=None):
+    args = parse_args(argv)
 
-    # 4) Degreed learning completions
-    degreed_learning = load_degreed_learning()
+    if args.clear_cache:
+        removed = excel_cache.invalidate()
+        print(f"Removed {removed} Excel cache entries")
+    if args.no_cache:
+        # Environment, so that worker processes see it as well
+        os.environ["EXCEL_CACHE"] = "0"
+    if args.profile is not None:
+        instrumentation.enable()
 
-    # 5) (Optional) Load strategy-skill mapping if present
-    strategy_skill_mapping = load_strategy_skill_mapping()  # uses default filename
+    manifest = load_manifest()
+    if args.incremental:
+        table_names, changed = plan_incremental(manifest, args.format, args.compact)
+        for filename in changed:
+            print(f"Changed source: {filename}")
+        if not table_names:
+            print("All output tables are up to date.")
+        else:
+            print(f"Rebuilding {len(table_names)} tables: {', '.join(table_names)}")
+    else:
+        table_names = list(TABLE_TASKS)
+        # Every table is rebuilt, so only record size and mtime instead of
+        # reading each source file a second time to hash it
+        changed = changed_sources(
+            manifest, sorted(set(TASK_SOURCES.values())), hash_content=False
+        )
 
-    # Save all tables to CSV
-    tables_to_save = {
-        # RHRHAZ00
-        "persons": rhr_tables["persons"],
-        "positions": rhr_tables["positions"],
-        "person_position_history": rhr_tables["person_position_history"],
-        "position_tasks": rhr_tables["position_tasks"],
-        "task_z_links": rhr_tables["task_z_links"],
-        "z_descriptions": rhr_tables["z_descriptions"],
-        # Qualifications & training
-        "qualifications": qualifications,
-        "person_qualification_history": person_qualification_history,
-        "training_events": training_events,
-        "training_participation": training_participation,
-        # Skills & programs
-        "skill_mapping": skill_mapping,
-        "programs": programs,
-        # Degreed
-        "degreed_learning": degreed_learning,
-        # Note: we are not writing strategy_skill_mapping to CSV; it is JSON-based.
-    }
+    # Load the needed source files (optionally in parallel)
+    with stage("build_tables") as s:
+        tables_to_save = build_tables(
+            workers=args.workers,
+            table_names=table_names,
+            compact=args.compact,
+            chunk_rows=args.chunk_rows,
+        )
+        s.rows_out = sum(map(len, tables_to_save.values()))
 
+    # (Optional) Load strategy-skill mapping if present
+    strategy_skill_mapping = load_strategy_skill_mapping()  # uses default filename
+
+    # Save all tables in the selected format
     for name, df in tables_to_save.items():
-        df.to_csv(OUTPUT_DIR / f"{name}.csv", index=False)
-        print(f"Saved {name}.csv with {len(df)} rows")
+        with stage(f"write:{name}", rows_in=len(df)) as s:
+            path = write_table(df, name, args.format)
+            s.rows_out = len(df)
+            s.extra["format"] = args.format
+        print(f"Saved {path.name} with {len(df)} rows")
+
+    if args.sqlite is not None:
+        db_tables = dict(tables_to_save)
+        # An --incremental run only rebuilds some tables; if the database is
+        # new or incomplete, load the others from the output files as well
+        if missing_tables(TABLE_TASKS, args.sqlite):
+            for name in TABLE_TASKS:
+                if name not in db_tables and find_table(name)[0] is not None:
+                    db_tables[name] = read_table(name)
+        if db_tables:
+            with stage("write:sqlite", rows_in=sum(map(len, db_tables.values()))):
+                write_sqlite(db_tables, args.sqlite)
+            print(f"Loaded {len(db_tables)} tables into {args.sqlite.resolve()}")
+
+    # The graph only needs recompiling when one of its link tables was rebuilt
+    if args.graph and (
+        not DEFAULT_GRAPH_DIR.exists() or any(name in tables_to_save for name in GRAPH_TABLES)
+    ):
+        with stage("compile_role_graph"):
+            graph_dir = compile_role_graph(*(tables_to_save.get(name) for name in GRAPH_TABLES))
+        print(f"Compiled role graph into {graph_dir.resolve()}")
+
+    # Record what the outputs were built from, for the next --incremental run
+    manifest["format"] = args.format
+    manifest["compact"] = args.compact
+    manifest["sources"].update(changed)
+    for name in tables_to_save:
+        manifest["tables"][name] = {
+            "sources": sorted({TASK_SOURCES[task] for task in TABLE_TASKS[name]}),
+            "rows": len(tables_to_save[name]),
+        }
+    save_manifest(manifest)
 
     # If you want to also save the mapping as a CSV for inspection, you can do:
     if strategy_skill_mapping is not None:
@@ -116,6 +404,11 @@ def main():
                 f"to {OUTPUT_DIR.resolve()}"
             )
 
+    if args.profile is not None:
+        instrumentation.print_summary("Ingest profile")
+        report = instrumentation.write_report(args.profile, run="main")
+        print(f"Saved profile report to {report.resolve()}")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
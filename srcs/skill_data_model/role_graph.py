@@ -0,0 +1,245 @@
+"""
+Compiled person -> position -> task -> competency graph.
+
+The RHRHAZ00 tables form a chain (P_S: person -> position, S_T: position ->
+task, T_ZP/T_ZS/T_ZX: task -> competency). Answering "which competencies
+does this person's role require" with pandas means three merges over the
+full tables. compile_role_graph() encodes every node as an integer and
+stores each edge layer as CSR adjacency arrays (indptr / indices, plus
+validity dates for the dated layers), in both directions, as .npy files.
+RoleGraph.load() memory-maps them, so opening the graph is cheap and a
+query only touches the few array slices it walks.
+
+Node IDs are looked up by binary search in sorted vocabulary arrays;
+competencies are keyed as "<z_type>:<z_id>" (e.g. "ZP:70000006").
+
+This is a storage and query layer only: build_employee_skills_real.py infers
+skill levels from course participation and Degreed completions and does not
+read the graph.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import OUTPUT_DIR
+from table_io import read_table
+from validity_index import MAX_DATE, MIN_DATE, as_date, as_date_array
+
+DEFAULT_GRAPH_DIR = OUTPUT_DIR / "role_graph"
+GRAPH_FORMAT_VERSION = 1
+
+# Source tables of the graph (main.py recompiles it when one of them changes)
+GRAPH_TABLES = ["person_position_history", "position_tasks", "task_z_links"]
+
+NODE_TYPES = ["person", "position", "task", "competency"]
+
+# name -> (source node type, target node type, dated)
+EDGE_LAYERS = {
+    "person_position": ("person", "position", True),
+    "position_task": ("position", "task", True),
+    "task_competency": ("task", "competency", False),
+}
+
+
+def _vocabulary(*columns) -> np.ndarray:
+    values = pd.concat([pd.Series(c).astype(str) for c in columns], ignore_index=True)
+    return np.unique(values.to_numpy(dtype=str))
+
+
+def _encode(vocab: np.ndarray, values) -> np.ndarray:
+    return np.searchsorted(vocab, pd.Series(values).astype(str).to_numpy(dtype=str))
+
+
+def _csr(src, dst, n_src, starts=None, ends=None) -> dict:
+    """
+    CSR arrays for edges src -> dst (neighbours sorted by target code).
+    """
+    order = np.lexsort((dst, src))
+    counts = np.bincount(src, minlength=n_src)
+    arrays = {
+        "indptr": np.concatenate(([0], np.cumsum(counts))).astype(np.int64),
+        "indices": dst[order].astype(np.int32),
+    }
+    if starts is not None:
+        arrays["valid_from"] = starts[order]
+        arrays["valid_to"] = ends[order]
+    return arrays
+
+
+def compile_role_graph(
+    person_positions: pd.DataFrame = None,
+    position_tasks: pd.DataFrame = None,
+    task_z_links: pd.DataFrame = None,
+    graph_dir: Path = DEFAULT_GRAPH_DIR,
+) -> Path:
+    """
+    Build the graph from the three link tables (read from OUTPUT_DIR when
+    not given) and save it to graph_dir.
+    """
+    if person_positions is None:
+        person_positions = read_table("person_position_history")
+    if position_tasks is None:
+        position_tasks = read_table("position_tasks")
+    if task_z_links is None:
+        task_z_links = read_table("task_z_links")
+
+    competency_keys = (
+        task_z_links["z_type"].astype(str) + ":" + task_z_links["z_id"].astype(str)
+    )
+    vocab = {
+        "person": _vocabulary(person_positions["person_id"]),
+        "position": _vocabulary(person_positions["position_id"], position_tasks["position_id"]),
+        "task": _vocabulary(position_tasks["task_id"], task_z_links["task_id"]),
+        "competency": _vocabulary(competency_keys),
+    }
+
+    edges = {
+        "person_position": (
+            person_positions["person_id"], person_positions["position_id"], person_positions
+        ),
+        "position_task": (position_tasks["position_id"], position_tasks["task_id"], position_tasks),
+        "task_competency": (task_z_links["task_id"], competency_keys, None),
+    }
+
+    graph_dir = Path(graph_dir)
+    graph_dir.mkdir(parents=True, exist_ok=True)
+    counts = {}
+    for layer, (src_type, dst_type, dated) in EDGE_LAYERS.items():
+        src_values, dst_values, frame = edges[layer]
+        src = _encode(vocab[src_type], src_values)
+        dst = _encode(vocab[dst_type], dst_values)
+        starts = ends = None
+        if dated:
+            starts = as_date_array(frame["valid_from"], MIN_DATE).astype("datetime64[D]")
+            ends = as_date_array(frame["valid_to"], MAX_DATE).astype("datetime64[D]")
+        directions = {
+            "fwd": _csr(src, dst, len(vocab[src_type]), starts, ends),
+            "rev": _csr(dst, src, len(vocab[dst_type]), starts, ends),
+        }
+        for direction, arrays in directions.items():
+            for array_name, array in arrays.items():
+                np.save(graph_dir / f"{layer}.{direction}.{array_name}.npy", array)
+        counts[layer] = int(len(src))
+
+    for node_type, values in vocab.items():
+        np.save(graph_dir / f"{node_type}.vocab.npy", values)
+
+    meta = {
+        "version": GRAPH_FORMAT_VERSION,
+        "nodes": {node_type: int(len(values)) for node_type, values in vocab.items()},
+        "edges": counts,
+    }
+    (graph_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return graph_dir
+
+
+class RoleGraph:
+    """
+    Read-only view of a compiled role graph (see compile_role_graph).
+    """
+
+    def __init__(self, graph_dir: Path = DEFAULT_GRAPH_DIR, mmap: bool = True):
+        graph_dir = Path(graph_dir)
+        meta = json.loads((graph_dir / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("version") != GRAPH_FORMAT_VERSION:
+            raise ValueError(
+                f"{graph_dir} was compiled with an incompatible format; "
+                f"run compile_role_graph() again."
+            )
+        mode = "r" if mmap else None
+        self.meta = meta
+        self.vocab = {
+            node_type: np.load(graph_dir / f"{node_type}.vocab.npy", mmap_mode=mode)
+            for node_type in NODE_TYPES
+        }
+        self.layers = {}
+        for layer, (_, _, dated) in EDGE_LAYERS.items():
+            names = ["indptr", "indices"] + (["valid_from", "valid_to"] if dated else [])
+            for direction in ("fwd", "rev"):
+                self.layers[layer, direction] = {
+                    name: np.load(graph_dir / f"{layer}.{direction}.{name}.npy", mmap_mode=mode)
+                    for name in names
+                }
+
+    @classmethod
+    def load(cls, graph_dir: Path = DEFAULT_GRAPH_DIR, mmap: bool = True):
+        return cls(graph_dir, mmap=mmap)
+
+    def node_code(self, node_type: str, node_id) -> int:
+        """
+        Integer code of a node, or -1 if it is not in the graph.
+        """
+        vocab = self.vocab[node_type]
+        key = str(node_id)
+        pos = int(np.searchsorted(vocab, key))
+        return pos if pos < len(vocab) and vocab[pos] == key else -1
+
+    def _step(self, layer: str, direction: str, codes: np.ndarray, day) -> np.ndarray:
+        """
+        Unique neighbour codes of codes through one edge layer, keeping only
+        edges valid on day (dated layers, when day is not None).
+        """
+        arrays = self.layers[layer, direction]
+        indptr = arrays["indptr"]
+        lo = np.asarray(indptr[codes])
+        lengths = np.asarray(indptr[codes + 1]) - lo
+        total = int(lengths.sum())
+        if not total:
+            return np.empty(0, dtype=np.int32)
+        # Positions of all neighbour slices, concatenated
+        offsets = np.repeat(lo - np.cumsum(lengths) + lengths, lengths)
+        edges = offsets + np.arange(total)
+        targets = np.asarray(arrays["indices"][edges])
+        if day is not None and "valid_from" in arrays:
+            valid = (arrays["valid_from"][edges] <= day) & (arrays["valid_to"][edges] >= day)
+            targets = targets[valid]
+        return np.unique(targets)
+
+    def _walk(self, start_type: str, node_id, path, date) -> np.ndarray:
+        code = self.node_code(start_type, node_id)
+        if code < 0:
+            return np.empty(0, dtype=np.int32)
+        day = None if date is None else as_date(date).astype("datetime64[D]")
+        codes = np.array([code])
+        for layer, direction in path:
+            codes = self._step(layer, direction, codes, day)
+            if not len(codes):
+                break
+        return codes
+
+    def competencies_for_person(self, person_id, date=None) -> list:
+        """
+        Competencies ("ZP:<id>", ...) required by the positions a person held
+        on date (any time if date is None), through the position's tasks.
+        """
+        codes = self._walk(
+            "person",
+            person_id,
+            [("person_position", "fwd"), ("position_task", "fwd"), ("task_competency", "fwd")],
+            date,
+        )
+        return self.vocab["competency"][codes].tolist()
+
+    def competencies_for_position(self, position_id, date=None) -> list:
+        """
+        Competencies required by a position's tasks valid on date.
+        """
+        codes = self._walk(
+            "position", position_id, [("position_task", "fwd"), ("task_competency", "fwd")], date
+        )
+        return self.vocab["competency"][codes].tolist()
+
+    def persons_requiring(self, z_type: str, z_id, date=None) -> list:
+        """
+        Persons whose position on date (any time if date is None) has a task
+        requiring the competency z_type / z_id.
+        """
+        codes = self._walk(
+            "competency",
+            f"{z_type}:{z_id}",
+            [("task_competency", "rev"), ("position_task", "rev"), ("person_position", "rev")],
+            date,
+        )
+        return self.vocab["person"][codes].tolist()
@@ -1,8 +1,17 @@
+import argparse
+import heapq
 import json
 from pathlib import Path
 import re
 from typing import Dict, List
 
+import numpy as np
+import pandas as pd
+
+from employee_skills_io import find_employee_skills
+from skill_matrix import SkillMatrix, load_inverted_index, load_skill_matrix
+from strategy_skill_resolver import SkillResolver, load_fuzzy_rules, resolve_strategy_skills
+
 
 LEVEL_VALUE = {
     "None": 0.0,
@@ -12,9 +21,16 @@ LEVEL_VALUE = {
     "Expert": 1.1,  # slight bonus if above required
 }
 
-# Map strategy skill codes to internal skill names in employee_skills.json
-# Will be loaded from strategy_skill_mapping.json at runtime
-STRATEGY_SKILL_TO_INTERNAL = {}
+# strategy_skill_mapping.json (generated by generate_skill_mapping_with_llm.py)
+# maps strategy skill codes to internal skill names in employee_skills.json;
+# strategy_skill_resolver combines it with the fuzzy rules in config.py
+STRATEGY_SKILL_MAPPING_FILE = "strategy_skill_mapping.json"
+
+# Number of candidates written to candidate_employees.json (--top-n)
+DEFAULT_TOP_N = 50
+
+# Employees scored at once while selecting the top candidates
+SCORE_CHUNK_ROWS = 50_000
 
 
 def parse_strategy(strategy_text: str) -> List[Dict]:
@@ -102,11 +118,18 @@ def required_level_value(level: str) -> float:
 
 def compute_match(
     employee_skills: Dict[str, str],
-    required_skills: List[Dict]
+    required_skills: List[Dict],
+    resolver: SkillResolver = None,
 ) -> Dict:
     """
-    Compute match score for one employee vs one goal.
+    Compute match score for one employee vs one goal. resolver must cover
+    the employee's skill names (without one, a resolver of the fuzzy rules
+    over them is compiled).
     """
+    if resolver is None:
+        resolver = SkillResolver.compile(
+            [rs["skill_code"] for rs in required_skills], list(employee_skills), {}, load_fuzzy_rules()
+        )
     details = []
     scores = []
 
@@ -117,7 +140,7 @@ def compute_match(
         skill_code = rs["skill_code"]
         req_level = rs["required_level"]
 
-        internal_names = STRATEGY_SKILL_TO_INTERNAL.get(skill_code, [])
+        internal_names = resolver.exact.get(skill_code, [])
         best_level_value = 0.0
         best_level_name = "None"
         best_internal_name = None
@@ -135,25 +158,9 @@ def compute_match(
 
         # Fuzzy matching
         if best_internal_name is None:
-            code_l = skill_code.lower()
-
             for in_name_l, (orig_name, lvl) in lower_map.items():
                 val = 0.0
-
-                if "python" in code_l and "python" in in_name_l:
-                    val = level_to_value(lvl)
-                elif "mlops" in code_l and (
-                    "mlops" in in_name_l or "machine learning" in in_name_l
-                ):
-                    val = level_to_value(lvl)
-                elif "ci" in code_l and (
-                    "ci/cd" in in_name_l
-                    or "continuous integration" in in_name_l
-                    or "version control" in in_name_l
-                    or "devops" in in_name_l
-                ):
-                    val = level_to_value(lvl)
-                elif "sql" in code_l and "sql" in in_name_l:
+                if resolver.accepts_fuzzy(skill_code, orig_name):
                     val = level_to_value(lvl)
 
                 if val > best_level_value:
@@ -179,23 +186,279 @@ def compute_match(
     return {"match_score": overall, "skill_matches": details}
 
 
-def main():
+class StrategyScores:
+    """
+    Match scores of every employee (SkillMatrix row) against every goal,
+    as computed by compute_match, kept as arrays:
+
+        skill_scores[g]  (employees x required skills of goal g) scores
+        columns[g]       matrix column of the internal skill used, -1 = none
+        level_codes[g]   its level code (index into matrix.levels)
+        goal_scores      (employees x goals) match_score per goal
+        overall_scores   sum of the goal scores per employee
+    """
+
+    def __init__(self, matrix: SkillMatrix, goals: List[Dict], skill_scores, columns, level_codes):
+        self.matrix = matrix
+        self.goals = goals
+        self.skill_scores = skill_scores
+        self.columns = columns
+        self.level_codes = level_codes
+
+        n = matrix.shape[0]
+        self.goal_scores = np.zeros((n, len(goals)))
+        # Add up in the same order as compute_match / main did, so the
+        # floats come out identical
+        for g, scores in enumerate(skill_scores):
+            if scores.shape[1]:
+                total = np.zeros(n)
+                for j in range(scores.shape[1]):
+                    total = total + scores[:, j]
+                self.goal_scores[:, g] = total / scores.shape[1]
+        self.overall_scores = np.zeros(n)
+        for g in range(len(goals)):
+            self.overall_scores = self.overall_scores + self.goal_scores[:, g]
+
+    def skill_matches(self, row: int, g: int) -> List[Dict]:
+        """
+        compute_match()["skill_matches"] of employee row for goal g.
+        """
+        details = []
+        for j, rs in enumerate(self.goals[g]["required_skills"]):
+            col = self.columns[g][row, j]
+            details.append(
+                {
+                    "skill_code": rs["skill_code"],
+                    "required_level": rs["required_level"],
+                    "inferred_level": self.matrix.levels[self.level_codes[g][row, j]],
+                    "internal_skill_name": self.matrix.skills[col] if col >= 0 else None,
+                    "score": float(self.skill_scores[g][row, j]),
+                }
+            )
+        return details
+
+    def candidate(self, row: int) -> Dict:
+        """
+        The candidate record of employee row (as written to
+        candidate_employees.json).
+        """
+        return {
+            "employee_id": self.matrix.employees[row],
+            "overall_score": float(self.overall_scores[row]),
+            "per_goal_scores": [
+                {
+                    "goal_id": goal["id"],
+                    "match_score": float(self.goal_scores[row, g]),
+                    "skill_matches": self.skill_matches(row, g),
+                }
+                for g, goal in enumerate(self.goals)
+            ],
+        }
+
+
+def score_employees(matrix: SkillMatrix, goals: List[Dict], resolver: SkillResolver) -> StrategyScores:
+    """
+    compute_match for every employee of matrix and every goal, with array
+    operations: each required skill becomes the columns of its exact names
+    (best level wins, ties to the first mapped name) and of its fuzzy names
+    (used for employees with none of the exact ones; ties to the employee's
+    first skill), as resolved by resolver.
+    """
+    n = matrix.shape[0]
+    values = matrix.values(LEVEL_VALUE)
+    rows = matrix.row_ids()
+    fuzzy_columns = {}
+
+    skill_scores, columns, level_codes = [], [], []
+    for goal in goals:
+        required = goal["required_skills"]
+        goal_scores = np.zeros((n, len(required)))
+        goal_columns = np.full((n, len(required)), -1, dtype=np.int64)
+        goal_levels = np.zeros((n, len(required)), dtype=np.int64)
+
+        for j, rs in enumerate(required):
+            skill_code = rs["skill_code"]
+            best_value, best_entry = _best_exact(
+                matrix, values, rows, resolver.exact.get(skill_code, [])
+            )
+
+            if skill_code not in fuzzy_columns:
+                accepted = np.zeros(len(matrix.skills), dtype=bool)
+                accepted[[matrix.skill_index(name) for name in resolver.fuzzy.get(skill_code, [])]] = True
+                fuzzy_columns[skill_code] = accepted
+            _apply_best_fuzzy(
+                matrix, values, rows, fuzzy_columns[skill_code], best_value, best_entry
+            )
+
+            found = best_entry >= 0
+            goal_columns[found, j] = matrix.indices[best_entry[found]]
+            goal_levels[found, j] = matrix.data[best_entry[found]]
+            req_val = required_level_value(rs["required_level"])
+            if req_val > 0:
+                goal_scores[:, j] = np.minimum(best_value / req_val, 1.0)
+
+        skill_scores.append(goal_scores)
+        columns.append(goal_columns)
+        level_codes.append(goal_levels)
+
+    scores = StrategyScores(matrix, goals, skill_scores, columns, level_codes)
+    _rescore_case_duplicates(scores, resolver)
+    return scores
+
+
+def _best_exact(matrix: SkillMatrix, values, rows, internal_names):
+    """
+    (best level value, CSR entry of it or -1) per employee over the mapped
+    internal skill names, the first name winning ties.
+    """
+    n = matrix.shape[0]
+    best_value = np.zeros(n)
+    best_entry = np.full(n, -1, dtype=np.int64)
+    ranks = np.full(len(matrix.skills), len(internal_names), dtype=np.int64)
+    for rank, name in reversed(list(enumerate(internal_names))):
+        col = matrix.skill_index(name)
+        if col >= 0:
+            ranks[col] = rank
+    entries = np.flatnonzero(ranks[matrix.indices] < len(internal_names))
+    if not len(entries):
+        return best_value, best_entry
+
+    entry_values = values[entries]
+    entry_rows = rows[entries]
+    # Highest value first, then the earliest mapped name
+    order = np.lexsort((ranks[matrix.indices[entries]], -entry_values, entry_rows))
+    entry_rows, entries, entry_values = entry_rows[order], entries[order], entry_values[order]
+    first = np.flatnonzero(np.concatenate(([True], entry_rows[1:] != entry_rows[:-1])))
+    keep = first[entry_values[first] > 0]
+    best_value[entry_rows[keep]] = entry_values[keep]
+    best_entry[entry_rows[keep]] = entries[keep]
+    return best_value, best_entry
+
+
+def _apply_best_fuzzy(matrix, values, rows, accepted, best_value, best_entry):
+    """
+    Fill best_value / best_entry in place for employees without an exact
+    match from their skills in the accepted columns: the highest level,
+    ties going to the skill that comes first in the employee's skills.
+    """
+    entries = np.flatnonzero(accepted[matrix.indices] & (best_entry[rows] < 0))
+    if not len(entries):
+        return
+    entry_values = values[entries]
+    entry_rows = rows[entries]
+    order = np.lexsort((entries, -entry_values, entry_rows))
+    entry_rows, entries, entry_values = entry_rows[order], entries[order], entry_values[order]
+    first = np.flatnonzero(np.concatenate(([True], entry_rows[1:] != entry_rows[:-1])))
+    keep = first[entry_values[first] > 0]
+    best_value[entry_rows[keep]] = entry_values[keep]
+    best_entry[entry_rows[keep]] = entries[keep]
+
+
+def _rescore_case_duplicates(scores: StrategyScores, resolver: SkillResolver):
+    """
+    compute_match folds skill names to lower case, so of two skills of one
+    employee that differ only in case the first position and the last level
+    count. The arrays do not model that; recompute those employees (if any)
+    with compute_match itself.
+    """
+    matrix = scores.matrix
+    groups = pd.factorize(pd.Series([name.lower() for name in matrix.skills], dtype=object))[0]
+    if len(set(groups)) == len(groups):
+        return
+    entries = pd.DataFrame({"row": matrix.row_ids(), "group": groups[matrix.indices]})
+    affected = np.unique(entries["row"][entries.duplicated()].to_numpy())
+    for row in affected:
+        employee_skills = matrix.row_skills(row)
+        for g, goal in enumerate(scores.goals):
+            res = compute_match(employee_skills, goal["required_skills"], resolver)
+            for j, detail in enumerate(res["skill_matches"]):
+                name = detail["internal_skill_name"]
+                scores.skill_scores[g][row, j] = detail["score"]
+                scores.columns[g][row, j] = matrix.skill_index(name) if name is not None else -1
+                scores.level_codes[g][row, j] = matrix.levels.index(detail["inferred_level"])
+            scores.goal_scores[row, g] = res["match_score"]
+        scores.overall_scores[row] = sum(float(score) for score in scores.goal_scores[row])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Score employees against strategy.md and write the best candidates."
+    )
+    parser.add_argument(
+        "--top-n",
+        type=int,
+        default=DEFAULT_TOP_N,
+        help="Number of candidates to write (default: %(default)s).",
+    )
+    return parser.parse_args(argv)
+
+
+def top_rows(matrix: SkillMatrix, goals: List[Dict], resolver: SkillResolver, rows, top_n: int,
+             chunk_rows: int = SCORE_CHUNK_ROWS) -> List[int]:
+    """
+    The (at most top_n) matrix rows among rows with the highest overall
+    score above 0, best first, ties to the lower row (file order).
+
+    Rows are scored SCORE_CHUNK_ROWS at a time and only the best top_n of
+    each chunk are offered to a bounded heap, so no more than one chunk of
+    scores is held at once.
+    """
+    def best_of_chunks():
+        for start in range(0, len(rows), chunk_rows):
+            chunk = np.asarray(rows[start:start + chunk_rows])
+            overall = score_employees(matrix.take_rows(chunk), goals, resolver).overall_scores
+            order = np.lexsort((chunk, -overall))[:top_n]
+            order = order[overall[order] > 0]
+            yield from zip(overall[order].tolist(), chunk[order].tolist())
+
+    best = heapq.nlargest(top_n, best_of_chunks(), key=lambda item: (item[0], -item[1]))
+    return [row for _score, row in best]
+
+
+def select_candidates(matrix: SkillMatrix, goals: List[Dict], resolver: SkillResolver,
+                      index, top_n: int) -> List[Dict]:
+    """
+    The candidate records of the top_n employees, as a stable sort of all
+    employees by overall score would rank them.
+
+    Only employees with at least one skill some goal can use (found via
+    the inverted index) can score above 0, so only they are scored. If fewer
+    than top_n score above 0, the list is filled with the other employees in
+    file order. The per-skill details are built for the selected employees
+    only.
+    """
+    relevant_names = set().union(
+        *(resolver.names(rs["skill_code"]) for goal in goals for rs in goal["required_skills"])
+    )
+    visited = index.rows_with_any([matrix.skill_index(name) for name in relevant_names])
+    selected = top_rows(matrix, goals, resolver, visited, top_n)
+
+    # Everyone else scores 0 and follows in file order
+    if len(selected) < top_n:
+        taken = set(selected)
+        fill = (row for row in range(matrix.shape[0]) if row not in taken)
+        selected += [row for _, row in zip(range(top_n - len(selected)), fill)]
+
+    scores = score_employees(matrix.take_rows(selected), goals, resolver)
+    return [scores.candidate(i) for i in range(len(selected))]
+
+
+def main(argv=None):
+    top_n = parse_args(argv).top_n
     base_dir = Path(".")
     strategy_path = base_dir / "strategy.md"
-    employee_skills_path = base_dir / "employee_skills.json"
+    # employee_skills.json / .jsonl / .jsonl.gz, whichever was written last
+    employee_skills_path = find_employee_skills(base_dir)
     output_path = base_dir / "candidate_employees.json"
 
     if not strategy_path.exists():
         raise FileNotFoundError(f"strategy.md not found at {strategy_path.resolve()}")
     if not employee_skills_path.exists():
         raise FileNotFoundError(
-            f"employee_skills.json not found at {employee_skills_path.resolve()}"
+            f"{employee_skills_path.name} not found at {employee_skills_path.resolve()}"
         )
 
     strategy_text = strategy_path.read_text(encoding="utf-8")
-    employee_skills_data = json.loads(
-        employee_skills_path.read_text(encoding="utf-8")
-    )
 
     goals = parse_strategy(strategy_text)
     print(f"Parsed {len(goals)} goals from strategy.md")
@@ -203,44 +466,22 @@ def main():
     for g in goals:
         print("DEBUG goal:", g["id"], "required_skills:", g["required_skills"])
 
-    candidates = []
-
-    for emp in employee_skills_data:
-        emp_id = emp["employee_id"]
-        skills = emp.get("skills", {})
-        per_goal = []
-        combined_score = 0.0
-
-        for goal in goals:
-            res = compute_match(skills, goal["required_skills"])
-            per_goal.append(
-                {
-                    "goal_id": goal["id"],
-                    "match_score": res["match_score"],
-                    "skill_matches": res["skill_matches"],
-                }
-            )
-            combined_score += res["match_score"]
-
-        candidates.append(
-            {
-                "employee_id": emp_id,
-                "overall_score": combined_score,
-                "per_goal_scores": per_goal,
-            }
-        )
-
-    candidates_sorted = sorted(
-        candidates, key=lambda x: x["overall_score"], reverse=True
+    matrix = load_skill_matrix(employee_skills_path)
+    total_employees = matrix.shape[0]
+    resolver = resolve_strategy_skills(
+        [rs["skill_code"] for goal in goals for rs in goal["required_skills"]],
+        matrix.skills,
+        base_dir / STRATEGY_SKILL_MAPPING_FILE,
     )
 
-    TOP_N = 50
-    top_candidates = candidates_sorted[:TOP_N]
+    top_candidates = select_candidates(
+        matrix, goals, resolver, load_inverted_index(employee_skills_path, matrix), top_n
+    )
 
     output = {
         "goals": goals,
         "candidates": top_candidates,
-        "total_employees": len(employee_skills_data),
+        "total_employees": total_employees,
     }
 
     output_path.write_text(
@@ -249,7 +490,7 @@ def main():
 
     print(
         f"Saved {len(top_candidates)} top candidates "
-        f"out of {len(employee_skills_data)} employees to {output_path.resolve()}"
+        f"out of {total_employees} employees to {output_path.resolve()}"
     )
 
 
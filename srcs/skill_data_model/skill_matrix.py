@@ -0,0 +1,404 @@
+"""
+Sparse employee x skill matrix of skill levels.
+
+build_employee_skills_real.py writes it next to employee_skills.json as
+employee_skills_matrix.npz: a CSR matrix (indptr / indices / data) with
+one row per employee, in output order, and one column per skill name. The
+data are level codes (index into LEVELS, 0 = "None"). Within a row the
+columns keep the order of the employee's skills dict, and skill columns are
+numbered in order of first appearance, so the JSON records can be rebuilt
+exactly from the matrix.
+
+Consumers that only need counts, scores or similarities work on the arrays
+instead of walking one dict per employee.
+
+Next to it, employee_skills_index.npz holds the inverted index (skill ->
+matrix rows of the employees having it), so a consumer interested in a few
+skills can skip everyone else.
+
+All three formats share these file names, so both files record the name,
+size and modification time of the employee skills file they were built
+from (source_stamp); they are only used for that same file.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from employee_skills_io import iter_employee_skills
+
+# Skill levels, lowest first; the level code is the position in this list
+LEVELS = ["None", "Beginner", "Practitioner", "Advanced", "Expert"]
+
+MATRIX_SUFFIX = "_matrix.npz"
+INDEX_SUFFIX = "_index.npz"
+
+
+def skill_matrix_path(employee_skills_path: Path) -> Path:
+    """
+    employee_skills.json / .jsonl / .jsonl.gz -> employee_skills_matrix.npz
+    """
+    path = Path(employee_skills_path)
+    stem = path.name.split(".", 1)[0]
+    return path.with_name(f"{stem}{MATRIX_SUFFIX}")
+
+
+def inverted_index_path(employee_skills_path: Path) -> Path:
+    """
+    employee_skills.json / .jsonl / .jsonl.gz -> employee_skills_index.npz
+    """
+    path = Path(employee_skills_path)
+    stem = path.name.split(".", 1)[0]
+    return path.with_name(f"{stem}{INDEX_SUFFIX}")
+
+
+def _encode(skill_names, levels, levels_order):
+    """
+    (skill codes, skill names in order of first appearance, level codes).
+    """
+    skill_codes, skills = pd.factorize(pd.Series(skill_names, dtype=object))
+    level_codes = pd.Categorical(levels, categories=levels_order).codes
+    if (level_codes < 0).any():
+        unknown = sorted({str(level) for level, code in zip(levels, level_codes) if code < 0})
+        raise ValueError(f"Unknown skill levels: {unknown}")
+    return skill_codes, skills, level_codes
+
+
+def source_stamp(employee_skills_path: Path) -> dict:
+    """
+    Name, size and modification time of an employee skills file.
+    """
+    stat = Path(employee_skills_path).stat()
+    return {"name": Path(employee_skills_path).name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _stamp_array(source) -> np.ndarray:
+    return np.asarray(json.dumps(source_stamp(source) if source is not None else None))
+
+
+def _read_stamp(arrays):
+    return json.loads(str(arrays["source"])) if "source" in arrays.files else None
+
+
+def saved_skill_matrix(employee_skills_path: Path):
+    """
+    The SkillMatrix saved next to employee_skills_path if it was built from
+    that very file (same name, size and modification time), else None.
+    """
+    employee_skills_path = Path(employee_skills_path)
+    matrix_path = skill_matrix_path(employee_skills_path)
+    if not matrix_path.exists():
+        return None
+    matrix = SkillMatrix.load(matrix_path)
+    if matrix.source != source_stamp(employee_skills_path):
+        return None
+    return matrix
+
+
+def load_skill_matrix(employee_skills_path: Path):
+    """
+    The SkillMatrix of an employee skills file: the matrix saved next to it
+    if it was built from this file (saved_skill_matrix), otherwise built by
+    reading the records.
+    """
+    matrix = saved_skill_matrix(employee_skills_path)
+    if matrix is None:
+        matrix = SkillMatrix.from_records(iter_employee_skills(employee_skills_path))
+    return matrix
+
+
+def load_inverted_index(employee_skills_path: Path, matrix):
+    """
+    The InvertedSkillIndex of matrix (the SkillMatrix of employee_skills_path):
+    the index saved next to the file if it was built from this file and has
+    the matrix's skills and size, otherwise built from matrix.
+    """
+    employee_skills_path = Path(employee_skills_path)
+    index_path = inverted_index_path(employee_skills_path)
+    if index_path.exists():
+        index = InvertedSkillIndex.load(index_path)
+        if (
+            index.source == source_stamp(employee_skills_path)
+            and index.n_employees == matrix.shape[0]
+            and np.array_equal(index.skills, matrix.skills)
+        ):
+            return index
+    return InvertedSkillIndex.from_matrix(matrix)
+
+
+class SkillMatrix:
+    """
+    CSR employee x skill matrix of level codes (see module docstring).
+    """
+
+    def __init__(self, employees, skills, indptr, indices, data, levels=LEVELS):
+        self.employees = np.asarray(employees, dtype=object)
+        self.skills = np.asarray(skills, dtype=object)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.data = np.asarray(data, dtype=np.int8)
+        self.levels = list(levels)
+        # source_stamp of the employee skills file it was loaded for, if any
+        self.source = None
+        self._employee_pos = None
+        self._skill_pos = None
+
+    @property
+    def shape(self):
+        return len(self.employees), len(self.skills)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.data)
+
+    # --- construction / persistence ---
+
+    @classmethod
+    def from_pairs(cls, employee_ids, skill_names, levels, levels_order=LEVELS):
+        """
+        Build from parallel arrays of (employee, skill, level name) where each
+        employee's pairs are contiguous and in output order.
+        """
+        employee_ids = np.asarray(employee_ids, dtype=object)
+        skill_codes, skills, level_codes = _encode(skill_names, levels, levels_order)
+
+        if len(employee_ids):
+            starts = np.flatnonzero(
+                np.concatenate(([True], employee_ids[1:] != employee_ids[:-1]))
+            )
+        else:
+            starts = np.empty(0, dtype=np.int64)
+        indptr = np.append(starts, len(employee_ids))
+        return cls(employee_ids[starts], np.asarray(skills, dtype=object),
+                   indptr, skill_codes, level_codes, levels_order)
+
+    @classmethod
+    def from_records(cls, records, levels_order=LEVELS):
+        """
+        Build from {"employee_id", "skills"} records (see employee_skills_io);
+        employees without skills get an empty row.
+        """
+        employee_ids, indptr, skill_names, levels = [], [0], [], []
+        for record in records:
+            skills = record.get("skills", {})
+            employee_ids.append(record["employee_id"])
+            skill_names.extend(skills.keys())
+            levels.extend(skills.values())
+            indptr.append(len(skill_names))
+        skill_codes, skills, level_codes = _encode(skill_names, levels, levels_order)
+        return cls(employee_ids, np.asarray(skills, dtype=object),
+                   indptr, skill_codes, level_codes, levels_order)
+
+    def save(self, path: Path, source: Path = None) -> Path:
+        """
+        Save to path; source is the employee skills file the matrix was
+        built from (recorded with source_stamp).
+        """
+        path = Path(path)
+        # np.savez_compressed adds .npz if missing
+        np.savez_compressed(
+            path,
+            employees=self.employees.astype(str),
+            skills=self.skills.astype(str),
+            indptr=self.indptr,
+            indices=self.indices,
+            data=self.data,
+            levels=np.asarray(self.levels),
+            source=_stamp_array(source),
+        )
+        return path
+
+    @classmethod
+    def load(cls, path: Path):
+        with np.load(path, allow_pickle=False) as arrays:
+            matrix = cls(
+                arrays["employees"].astype(object),
+                arrays["skills"].astype(object),
+                arrays["indptr"],
+                arrays["indices"],
+                arrays["data"],
+                arrays["levels"].tolist(),
+            )
+            matrix.source = _read_stamp(arrays)
+            return matrix
+
+    # --- lookups ---
+
+    def employee_index(self, employee_id) -> int:
+        if self._employee_pos is None:
+            self._employee_pos = {e: i for i, e in enumerate(self.employees)}
+        return self._employee_pos.get(str(employee_id), -1)
+
+    def skill_index(self, skill_name) -> int:
+        if self._skill_pos is None:
+            self._skill_pos = {s: i for i, s in enumerate(self.skills)}
+        return self._skill_pos.get(skill_name, -1)
+
+    def row_skills(self, row: int) -> dict:
+        """
+        Skills dict of one employee (as in employee_skills.json).
+        """
+        lo, hi = self.indptr[row], self.indptr[row + 1]
+        return {
+            self.skills[col]: self.levels[code]
+            for col, code in zip(self.indices[lo:hi], self.data[lo:hi])
+        }
+
+    def records(self):
+        """
+        Yield the {"employee_id", "skills"} records, in row order.
+        """
+        for row, employee_id in enumerate(self.employees):
+            yield {"employee_id": employee_id, "skills": self.row_skills(row)}
+
+    def take_rows(self, rows):
+        """
+        SkillMatrix of the given rows only (same skill columns).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        lengths = np.diff(self.indptr)[rows]
+        indptr = np.concatenate(([0], np.cumsum(lengths)))
+        entries = np.repeat(self.indptr[rows] - indptr[:-1], lengths) + np.arange(indptr[-1])
+        return SkillMatrix(self.employees[rows], self.skills, indptr,
+                           self.indices[entries], self.data[entries], self.levels)
+
+    def row_ids(self) -> np.ndarray:
+        """
+        Row number of every stored value (COO row array).
+        """
+        return np.repeat(np.arange(len(self.employees)), np.diff(self.indptr))
+
+    # --- matrix operations ---
+
+    def values(self, level_values: dict) -> np.ndarray:
+        """
+        Stored values mapped through level name -> number (missing -> 0.0).
+        """
+        lookup = np.array([float(level_values.get(level, 0.0)) for level in self.levels])
+        return lookup[self.data]
+
+    def skill_frequencies(self) -> np.ndarray:
+        """
+        Number of employees having each skill (per column).
+        """
+        return np.bincount(self.indices, minlength=len(self.skills))
+
+    def most_common(self, n: int = None) -> list:
+        """
+        (skill name, employee count) pairs, most frequent first; ties in
+        order of first appearance, like collections.Counter.most_common.
+        """
+        counts = self.skill_frequencies()
+        order = np.argsort(-counts, kind="stable")
+        if n is not None:
+            order = order[:n]
+        return [(self.skills[i], int(counts[i])) for i in order]
+
+    def dense_columns(self, columns, level_values: dict) -> np.ndarray:
+        """
+        Dense (employees x len(columns)) array of the level values of the
+        given column indices; 0.0 where an employee lacks the skill.
+        """
+        columns = np.asarray(columns, dtype=np.int64)
+        out = np.zeros((len(self.employees), len(columns)))
+        if not len(columns):
+            return out
+        position = np.full(len(self.skills), -1)
+        position[columns] = np.arange(len(columns))
+        wanted = position[self.indices]
+        keep = wanted >= 0
+        out[self.row_ids()[keep], wanted[keep]] = self.values(level_values)[keep]
+        return out
+
+    def employees_with_skill(self, skill_name, min_level: str = "Beginner") -> list:
+        """
+        Employee IDs having skill_name at min_level or above.
+        """
+        col = self.skill_index(skill_name)
+        if col < 0:
+            return []
+        mask = (self.indices == col) & (self.data >= self.levels.index(min_level))
+        return self.employees[self.row_ids()[mask]].tolist()
+
+    def similar_employees(self, employee_id, level_values: dict, top_n: int = 10) -> list:
+        """
+        The top_n employees whose skill vectors are most cosine-similar to
+        employee_id's, as (employee_id, similarity) pairs.
+        """
+        row = self.employee_index(employee_id)
+        if row < 0:
+            return []
+        values = self.values(level_values)
+        query = np.zeros(len(self.skills))
+        lo, hi = self.indptr[row], self.indptr[row + 1]
+        query[self.indices[lo:hi]] = values[lo:hi]
+
+        rows = self.row_ids()
+        dots = np.bincount(rows, weights=values * query[self.indices], minlength=len(self.employees))
+        norms = np.sqrt(np.bincount(rows, weights=values**2, minlength=len(self.employees)))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            similarity = np.where(norms > 0, dots / (norms * np.linalg.norm(query)), 0.0)
+        similarity[row] = -np.inf
+        order = np.argsort(-similarity, kind="stable")[:top_n]
+        return [(self.employees[i], float(similarity[i])) for i in order if similarity[i] > 0]
+
+
+class InvertedSkillIndex:
+    """
+    Skill -> employees index of a SkillMatrix: for column c, the rows
+    rows[indptr[c]:indptr[c + 1]] (ascending) have skill skills[c].
+    """
+
+    def __init__(self, skills, indptr, rows, n_employees: int):
+        self.skills = np.asarray(skills, dtype=object)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.n_employees = int(n_employees)
+        self.source = None
+
+    @classmethod
+    def from_matrix(cls, matrix: SkillMatrix):
+        # Entries are in row order, so a stable sort by column keeps the
+        # rows of each column ascending
+        order = np.argsort(matrix.indices, kind="stable")
+        indptr = np.concatenate(([0], np.cumsum(matrix.skill_frequencies())))
+        return cls(matrix.skills, indptr, matrix.row_ids()[order], matrix.shape[0])
+
+    def save(self, path: Path, source: Path = None) -> Path:
+        """
+        Save to path; source as in SkillMatrix.save.
+        """
+        path = Path(path)
+        np.savez_compressed(
+            path,
+            skills=self.skills.astype(str),
+            indptr=self.indptr,
+            rows=self.rows,
+            n_employees=np.int64(self.n_employees),
+            source=_stamp_array(source),
+        )
+        return path
+
+    @classmethod
+    def load(cls, path: Path):
+        with np.load(path, allow_pickle=False) as arrays:
+            index = cls(
+                arrays["skills"].astype(object),
+                arrays["indptr"],
+                arrays["rows"],
+                int(arrays["n_employees"]),
+            )
+            index.source = _read_stamp(arrays)
+            return index
+
+    def rows_with_any(self, columns) -> np.ndarray:
+        """
+        Ascending rows of the employees having at least one of the columns.
+        """
+        columns = [c for c in columns if c >= 0]
+        if not columns:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(
+            np.concatenate([self.rows[self.indptr[c]:self.indptr[c + 1]] for c in columns])
+        )
@@ -0,0 +1,109 @@
+"""
+Small query helpers over the SQLite database written by main.py --sqlite.
+
+Every function takes an open connection (see connect()) and returns a
+DataFrame with only the matching rows. Dates are ISO "YYYY-MM-DD" strings.
+"""
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from table_store import DEFAULT_DB_PATH
+
+
+def connect(db_path: Path = DEFAULT_DB_PATH) -> sqlite3.Connection:
+    if not Path(db_path).exists():
+        raise FileNotFoundError(
+            f"{db_path} not found. Run main.py --sqlite first to create it."
+        )
+    return sqlite3.connect(db_path)
+
+
+def query(conn: sqlite3.Connection, sql: str, params=()) -> pd.DataFrame:
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+def _as_of_clause(alias: str, as_of):
+    if as_of is None:
+        return "", ()
+    return f" AND {alias}.valid_from <= ? AND {alias}.valid_to >= ?", (as_of, as_of)
+
+
+def tasks_for_position(conn, position_id, as_of: str = None) -> pd.DataFrame:
+    """
+    Tasks of a position (optionally only those valid on as_of).
+    """
+    clause, params = _as_of_clause("pt", as_of)
+    return query(
+        conn,
+        "SELECT pt.task_id, pt.valid_from, pt.valid_to FROM position_tasks pt "
+        "WHERE pt.position_id = ?" + clause + " ORDER BY pt.task_id",
+        (str(position_id), *params),
+    )
+
+
+def positions_for_person(conn, person_id, as_of: str = None) -> pd.DataFrame:
+    """
+    Position history of a person (optionally only the positions held on as_of).
+    """
+    clause, params = _as_of_clause("ph", as_of)
+    return query(
+        conn,
+        "SELECT ph.position_id, ph.valid_from, ph.valid_to FROM person_position_history ph "
+        "WHERE ph.person_id = ?" + clause + " ORDER BY ph.valid_from",
+        (str(person_id), *params),
+    )
+
+
+def competencies_for_position(conn, position_id, as_of: str = None) -> pd.DataFrame:
+    """
+    ZP / ZS / ZX competencies required by the tasks of a position.
+    """
+    clause, params = _as_of_clause("pt", as_of)
+    return query(
+        conn,
+        "SELECT DISTINCT tz.z_type, tz.z_id, pt.task_id FROM position_tasks pt "
+        "JOIN task_z_links tz ON tz.task_id = pt.task_id "
+        "WHERE pt.position_id = ?" + clause + " ORDER BY tz.z_type, tz.z_id",
+        (str(position_id), *params),
+    )
+
+
+def persons_for_course(conn, course_code) -> pd.DataFrame:
+    """
+    SAP training participation rows for one course (event type).
+    """
+    return query(
+        conn,
+        "SELECT person_id, event_instance_id, start_date, end_date "
+        "FROM training_participation WHERE event_type_id = ? ORDER BY start_date",
+        (str(course_code),),
+    )
+
+
+def persons_for_degreed_content(conn, content_id) -> pd.DataFrame:
+    """
+    Degreed completions of one content item.
+    """
+    return query(
+        conn,
+        "SELECT person_id, completed_date, content_title FROM degreed_learning "
+        "WHERE content_id = ? ORDER BY completed_date",
+        (str(content_id),),
+    )
+
+
+def qualifications_for_person(conn, person_id, as_of: str = None) -> pd.DataFrame:
+    """
+    Qualifications of a person (optionally only those valid on as_of).
+    """
+    clause, params = _as_of_clause("pq", as_of)
+    return query(
+        conn,
+        "SELECT pq.qualification_id, q.qualification_name, pq.valid_from, pq.valid_to "
+        "FROM person_qualification_history pq "
+        "LEFT JOIN qualifications q ON q.qualification_id = pq.qualification_id "
+        "WHERE pq.person_id = ?" + clause + " ORDER BY pq.valid_from",
+        (str(person_id), *params),
+    )
@@ -0,0 +1,142 @@
+"""
+Resolution of strategy skill codes (skill.python, skill.ci, ...) to the
+internal skill names of employee_skills.json.
+
+A required skill is met by the best level among
+    exact  the internal names mapped to the code in strategy_skill_mapping.json
+           (first name wins ties), or, if the employee has none of them,
+    fuzzy  the internal names accepted by the fuzzy rules (config.py
+           STRATEGY_FUZZY_RULES).
+Both lists are computed once per run for the whole skill vocabulary and
+cached in STRATEGY_RESOLVER_CACHE_DIR, keyed by the mapping file, the rules,
+the skill codes and the vocabulary, so scoring an employee only looks names
+up.
+"""
+import hashlib
+import json
+from pathlib import Path
+
+from config import STRATEGY_FUZZY_RULES, STRATEGY_FUZZY_RULES_FILE, STRATEGY_RESOLVER_CACHE_DIR
+
+RESOLVER_VERSION = 1
+
+
+def load_fuzzy_rules(path=STRATEGY_FUZZY_RULES_FILE) -> list:
+    """
+    The fuzzy rules from the JSON file at path, or STRATEGY_FUZZY_RULES.
+    """
+    if not path:
+        return STRATEGY_FUZZY_RULES
+    rules = json.loads(Path(path).read_text(encoding="utf-8"))
+    return [[code_part, list(name_parts)] for code_part, name_parts in rules]
+
+
+def fuzzy_match(skill_code: str, internal_name: str, rules) -> bool:
+    """
+    Whether a fuzzy rule accepts internal_name for skill_code.
+    """
+    code_l = skill_code.lower()
+    name_l = internal_name.lower()
+    return any(
+        code_part in code_l and any(part in name_l for part in name_parts)
+        for code_part, name_parts in rules
+    )
+
+
+def load_strategy_skill_to_internal(mapping_text: str) -> dict:
+    """
+    strategy skill code -> internal skill names from the text of
+    strategy_skill_mapping.json (generated by generate_skill_mapping_with_llm.py).
+    """
+    try:
+        mapping_obj = json.loads(mapping_text)
+    except json.JSONDecodeError:
+        print("Warning: strategy skill mapping is not valid JSON; using fuzzy rules only.")
+        return {}
+    strategy_skill_to_internal = {}
+    for m in mapping_obj.get("mappings", []):
+        code = m.get("strategy_skill_code")
+        if code:
+            strategy_skill_to_internal[code] = list(m.get("internal_skill_names", []))
+    return strategy_skill_to_internal
+
+
+class SkillResolver:
+    """
+    Per strategy skill code, the internal skill names it accepts:
+    exact[code] (in mapping order) and fuzzy[code] (in vocabulary order),
+    both limited to the vocabulary it was compiled for.
+    """
+
+    def __init__(self, exact: dict, fuzzy: dict):
+        self.exact = exact
+        self.fuzzy = fuzzy
+        self._fuzzy_sets = {code: set(names) for code, names in fuzzy.items()}
+
+    @classmethod
+    def compile(cls, skill_codes, vocabulary, strategy_skill_to_internal: dict, rules):
+        known = set(vocabulary)
+        exact, fuzzy = {}, {}
+        for code in skill_codes:
+            exact[code] = [
+                name for name in strategy_skill_to_internal.get(code, []) if name in known
+            ]
+            fuzzy[code] = [name for name in vocabulary if fuzzy_match(code, name, rules)]
+        return cls(exact, fuzzy)
+
+    def accepts_fuzzy(self, skill_code: str, internal_name: str) -> bool:
+        return internal_name in self._fuzzy_sets.get(skill_code, ())
+
+    def names(self, skill_code: str) -> set:
+        """
+        Every internal name that can meet skill_code.
+        """
+        return set(self.exact.get(skill_code, [])) | self._fuzzy_sets.get(skill_code, set())
+
+    def to_json(self) -> dict:
+        return {"exact": self.exact, "fuzzy": self.fuzzy}
+
+    @classmethod
+    def from_json(cls, obj: dict):
+        return cls(obj["exact"], obj["fuzzy"])
+
+
+def resolve_strategy_skills(
+    skill_codes,
+    vocabulary,
+    mapping_path: Path = None,
+    rules=None,
+    cache_dir: Path = STRATEGY_RESOLVER_CACHE_DIR,
+) -> SkillResolver:
+    """
+    The SkillResolver of skill_codes over the internal skill names in
+    vocabulary, with the exact mappings of the strategy_skill_mapping.json
+    at mapping_path (None or missing = fuzzy rules only), from the cache if
+    it was compiled before for the same inputs.
+    """
+    rules = load_fuzzy_rules() if rules is None else rules
+    skill_codes = list(dict.fromkeys(skill_codes))
+    vocabulary = [str(name) for name in vocabulary]
+    mapping_text = ""
+    if mapping_path is not None and Path(mapping_path).exists():
+        mapping_text = Path(mapping_path).read_text(encoding="utf-8")
+
+    digest = hashlib.sha256()
+    for part in (
+        RESOLVER_VERSION,
+        hashlib.sha256(mapping_text.encode("utf-8")).hexdigest(),
+        rules,
+        skill_codes,
+        vocabulary,
+    ):
+        digest.update(json.dumps(part, ensure_ascii=False).encode("utf-8"))
+        digest.update(b"\0")
+    cache_path = Path(cache_dir) / f"{digest.hexdigest()}.json"
+    if cache_path.exists():
+        return SkillResolver.from_json(json.loads(cache_path.read_text(encoding="utf-8")))
+
+    strategy_skill_to_internal = load_strategy_skill_to_internal(mapping_text) if mapping_text else {}
+    resolver = SkillResolver.compile(skill_codes, vocabulary, strategy_skill_to_internal, rules)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps(resolver.to_json(), ensure_ascii=False), encoding="utf-8")
+    return resolver
@@ -0,0 +1,268 @@
+"""
+Synthetic versions of every input file main.py reads.
+
+The real SAP / Degreed exports cannot be shared, so this writes files with
+the same shape: cp1250 TXT exports with the "Dynamische Listenausgabe"
+preamble, the header row, embedded NUL bytes and VarPole values in both
+the fixed ("S 50001234") and irregular layouts, and xlsx files with the
+exact column names the loaders expect. The amount of data scales with the
+number of persons (BASE_PERSONS * scale), so loader performance can be
+measured at the sizes expected as more plants are onboarded:
+
+    python3 synthetic_data.py output/synthetic/x10 --scale 10
+    SKILL_DATA_DIR=output/synthetic/x10 python3 main.py
+
+Output is deterministic for a given scale and seed.
+"""
+import argparse
+import random
+from pathlib import Path
+
+import openpyxl
+
+from loaders_degreed import DEGREED_FILE
+from loaders_qualifications import QUALIFICATIONS_FILE, QUALIFICATION_HISTORY_FILE, TRAINING_FILE
+from loaders_rhrhaz00 import RHRHAZ00_TASKS
+from loaders_skills_programs import PROGRAMS_SE_FILE, SKILL_MAPPING_FILE
+
+BASE_PERSONS = 1000
+SAP_ENCODING = "cp1250"
+
+SAP_PREAMBLE = "Dynamische Listenausgabe\n\nRHRHAZ00 Export\n\n"
+SAP_HEADER = "VP\tTO\tID obj.\tVarPole\tZačátek\tKonec\tVar.pole uživatel.dat\n"
+DESCR_HEADER = "Var.plánu\tTyp obj.\tID objektu\tŘetězec\n"
+OPEN_END = "31.12.9999"
+
+# Object ID ranges per object type
+PERSON_BASE = 10000000
+QUALIFICATION_BASE = 40000000
+POSITION_BASE = 50000000
+TASK_BASE = 60000000
+COMPETENCY_BASE = 70000000
+EVENT_BASE = 80000000
+
+SKILLS = [
+    "Python", "SQL", "Machine Learning", "Welding", "Leadership",
+    "Version Control", "Data Quality", "Lean Management", "Electrical Safety",
+]
+DEGREED_TITLES = [
+    "Intro to Python", "Advanced SQL for analysts", "MLOps in practice",
+    "Git basics", "Digital transformation", "CI/CD pipelines",
+    "Machine learning 101", "Data quality essentials", "Leadership",
+    "python and sql", "Working with Excel", "Agile teams",
+]
+
+
+def _file_names() -> dict:
+    """
+    RHRHAZ00 task name -> source file name (as used by main.py).
+    """
+    return {name: args[0] for name, (_, args) in RHRHAZ00_TASKS.items()}
+
+
+class _Generator:
+    def __init__(self, out_dir: Path, persons: int, seed: int):
+        self.out_dir = out_dir
+        self.rnd = random.Random(seed)
+        self.persons = persons
+        self.positions = max(persons // 3, 10)
+        self.tasks = max(persons, 30)
+        self.competencies = max(persons // 20, 50)
+        self.course_codes = [f"SE/K{i}" for i in range(max(persons // 30, 30))]
+
+    def date(self) -> str:
+        rnd = self.rnd
+        return f"{rnd.randint(1, 28):02d}.{rnd.randint(1, 12):02d}.{rnd.randint(2000, 2025)}"
+
+    def end_date(self) -> str:
+        return OPEN_END if self.rnd.random() < 0.4 else self.date()
+
+    def varpole(self, type_code: str, object_id: int) -> str:
+        """
+        VarPole value: mostly the fixed layout, with the padding and
+        trailing-garbage variants seen in real exports.
+        """
+        roll = self.rnd.random()
+        if roll < 0.97:
+            return f"{type_code} {object_id}" if len(type_code) == 1 else f"{type_code}{object_id}"
+        if roll < 0.99:
+            return f"{type_code}   {object_id}\x00"
+        return f"B007 {type_code}{object_id} X"
+
+    def write_sap(self, filename: str, rows, header: str = SAP_HEADER, preamble: bool = True):
+        with open(self.out_dir / filename, "w", encoding=SAP_ENCODING, errors="replace", newline="") as f:
+            if preamble:
+                f.write(SAP_PREAMBLE)
+            f.write(header)
+            f.writelines(rows)
+
+    def write_xlsx(self, filename: str, header, rows):
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        if header is not None:
+            sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+        workbook.save(self.out_dir / filename)
+
+    # --- RHRHAZ00 relations ---
+
+    def person_positions(self):
+        rnd = self.rnd
+        for p in range(self.persons):
+            for k in range(rnd.randint(1, 4)):
+                position = POSITION_BASE + rnd.randrange(self.positions)
+                end = OPEN_END if k == 0 else self.date()
+                yield f"01\tP\t{PERSON_BASE + p}\t{self.varpole('S', position)}\t{self.date()}\t{end}\t\n"
+            # Relations to other object types are filtered out by the loader
+            if rnd.random() < 0.3:
+                yield f"01\tP\t{PERSON_BASE + p}\tQ {QUALIFICATION_BASE}\t{self.date()}\t{OPEN_END}\t\n"
+
+    def position_tasks(self):
+        rnd = self.rnd
+        for s in range(self.positions):
+            for _ in range(rnd.randint(1, 5)):
+                task = TASK_BASE + rnd.randrange(self.tasks)
+                yield f"01\tS\t{POSITION_BASE + s}\t{self.varpole('T', task)}\t{self.date()}\t{self.end_date()}\t\n"
+
+    def task_links(self, z_type: str):
+        rnd = self.rnd
+        for t in range(self.tasks):
+            for _ in range(rnd.randint(0, 3)):
+                z_id = COMPETENCY_BASE + rnd.randrange(self.competencies)
+                yield f"01\tT\t{TASK_BASE + t}\t{self.varpole(z_type, z_id)}\t{self.date()}\t{OPEN_END}\t\n"
+
+    def z_master(self, z_type: str):
+        for i in range(self.competencies):
+            for lang in "CDE":
+                text = f"Kompetence č. {i} ({lang}) – řízení kvality"
+                yield f"01\t{z_type}\t{COMPETENCY_BASE + i}\t{lang}\t{self.date()}\t{OPEN_END}\t{text}\n"
+
+    def zp_descriptions(self, lang_code: str):
+        for i in range(self.competencies):
+            nul = "\x00" if i % 17 == 0 else ""
+            yield f"01\tZP\t{COMPETENCY_BASE + i}\tPopis kompetence {i} žluťoučký kůň {lang_code}{nul}\n"
+        yield "01\tQ\t1\tjiný typ objektu\n"
+
+    # --- xlsx sources ---
+
+    def qualifications(self):
+        return [
+            [QUALIFICATION_BASE + i, f"Kvalifikace {i}", f"FM{i:04d}"]
+            for i in range(max(self.persons // 25, 40))
+        ]
+
+    def qualification_history(self):
+        n_quals = max(self.persons // 25, 40)
+        for _ in range(self.persons * 2):
+            yield [
+                str(PERSON_BASE + self.rnd.randrange(self.persons)),
+                self.date(),
+                self.end_date(),
+                str(QUALIFICATION_BASE + self.rnd.randrange(n_quals)),
+                "Název kvalifikace",
+                "x",
+            ]
+
+    def training(self):
+        codes = self.course_codes + ["ZZ1", "ZZ2"]
+        for i in range(self.persons * 4):
+            yield [
+                self.rnd.choice(codes),
+                "Kurz",
+                str(EVENT_BASE + i),
+                self.date(),
+                self.date(),
+                str(PERSON_BASE + self.rnd.randrange(self.persons)),
+                "x",
+            ]
+
+    def skill_mapping(self):
+        return [
+            [str(i), code, f"Kurz {code}", "Téma", "Oddělení", "Kontakt",
+             self.date(), OPEN_END, self.rnd.choice(SKILLS + [None]), "Kategorie"]
+            for i, code in enumerate(self.course_codes)
+        ]
+
+    def programs(self):
+        return [
+            [str(10000480 + i), "10000094", f"SE/B{i}", f"Mechanika {i}", "Mechanics"]
+            for i in range(10)
+        ]
+
+    def degreed(self):
+        rnd = self.rnd
+        for _ in range(self.persons * 3):
+            t = rnd.randrange(len(DEGREED_TITLES))
+            yield [
+                self.date(), str(PERSON_BASE + rnd.randrange(self.persons)), f"C{t}",
+                DEGREED_TITLES[t], "Course", "Provider", "True", rnd.choice([None, 4]),
+                10, "https://example.com", 30, 45,
+            ]
+
+
+def generate(out_dir: Path, scale: int = 1, seed: int = 1) -> Path:
+    """
+    Write all input files for BASE_PERSONS * scale persons into out_dir.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    gen = _Generator(out_dir, BASE_PERSONS * scale, seed)
+    files = _file_names()
+
+    gen.write_sap(files["person_position_history"], gen.person_positions())
+    gen.write_sap(files["position_tasks"], gen.position_tasks(), preamble=False)
+    for z_type in ("ZP", "ZS", "ZX"):
+        gen.write_sap(files[f"task_{z_type.lower()}_links"], gen.task_links(z_type))
+    for z_type in ("ZS", "ZX"):
+        gen.write_sap(files[f"{z_type.lower()}_master"], gen.z_master(z_type))
+    for lang in ("CS", "DE", "EN"):
+        gen.write_sap(files[f"zp_{lang.lower()}"], gen.zp_descriptions(lang), header=DESCR_HEADER)
+
+    gen.write_xlsx(QUALIFICATIONS_FILE, ["ID kvalifikace", "Kvalifikace", "Číslo FM"], gen.qualifications())
+    gen.write_xlsx(
+        QUALIFICATION_HISTORY_FILE,
+        ["ID P", "Počát.datum", "Koncové datum", "ID Q", "Název Q", "Poznámka"],
+        gen.qualification_history(),
+    )
+    gen.write_xlsx(
+        TRAINING_FILE,
+        ["Typ akce", "Označení typu akce", "IDOBJ", "Datum zahájení", "Datum ukončení",
+         "ID účastníka", "Poznámka"],
+        gen.training(),
+    )
+    gen.write_xlsx(
+        SKILL_MAPPING_FILE,
+        ["ID Kurzu", "Zkratka D", "Název D", "Téma", "Oddělení", "Kontakní osoba",
+         "Počát.datum", "Koncové datum", "Kompetence / Skill", "Kategorie"],
+        gen.skill_mapping(),
+    )
+    gen.write_xlsx(PROGRAMS_SE_FILE, None, gen.programs())
+    gen.write_xlsx(
+        DEGREED_FILE,
+        ["Completed Date", "Employee ID", "Content ID", "Content Title", "Content Type",
+         "Content Provider", "Completion is Verified", "Completion User Rating",
+         "Completion Points", "Content URL", "Verified Learning Minutes",
+         "Estimated Learning Minutes"],
+        gen.degreed(),
+    )
+    return out_dir
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic SAP / Degreed input files.")
+    parser.add_argument("out_dir", type=Path, help="Directory to write the files into.")
+    parser.add_argument(
+        "--scale",
+        type=int,
+        default=1,
+        help=f"Multiple of {BASE_PERSONS} persons (e.g. 1, 10, 100).",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    out_dir = generate(args.out_dir, scale=args.scale, seed=args.seed)
+    print(f"Wrote synthetic inputs for {BASE_PERSONS * args.scale} persons to {out_dir.resolve()}")
@@ -0,0 +1,80 @@
+"""
+Reading and writing the tables main.py produces in OUTPUT_DIR.
+
+Besides plain CSV, tables can be stored as compressed Parquet or Arrow IPC
+(Feather), which keep datetime and categorical dtypes, so readers get typed
+columns back without re-parsing text. read_table() picks whatever format is
+present and most recent.
+"""
+from pathlib import Path
+
+import pandas as pd
+
+from config import OUTPUT_DIR
+
+# format name -> file suffix
+TABLE_FORMATS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "feather": ".arrow",
+}
+
+COLUMNAR_COMPRESSION = "zstd"
+
+
+def table_path(name: str, fmt: str, output_dir: Path = OUTPUT_DIR) -> Path:
+    if fmt not in TABLE_FORMATS:
+        raise ValueError(
+            f"Unknown table format {fmt!r}; expected one of {list(TABLE_FORMATS)}"
+        )
+    return output_dir / f"{name}{TABLE_FORMATS[fmt]}"
+
+
+def write_table(df: pd.DataFrame, name: str, fmt: str = "csv", output_dir: Path = OUTPUT_DIR) -> Path:
+    """
+    Write one table as <output_dir>/<name>.<suffix> and return the path.
+    """
+    path = table_path(name, fmt, output_dir)
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "parquet":
+        df.to_parquet(path, index=False, compression=COLUMNAR_COMPRESSION)
+    else:
+        df.reset_index(drop=True).to_feather(path, compression=COLUMNAR_COMPRESSION)
+    return path
+
+
+def find_table(name: str, output_dir: Path = OUTPUT_DIR):
+    """
+    Return (path, fmt) of the most recently written version of a table,
+    or (None, None) if it does not exist in any format.
+    """
+    found = [
+        (path.stat().st_mtime, path, fmt)
+        for fmt in TABLE_FORMATS
+        for path in [table_path(name, fmt, output_dir)]
+        if path.exists()
+    ]
+    if not found:
+        return None, None
+    _, path, fmt = max(found)
+    return path, fmt
+
+
+def read_table(name: str, output_dir: Path = OUTPUT_DIR, parse_dates=None) -> pd.DataFrame:
+    """
+    Load a table written by write_table().
+
+    CSV tables are read as strings with parse_dates converted to datetimes;
+    columnar tables come back with the dtypes they were written with.
+    """
+    path, fmt = find_table(name, output_dir)
+    if path is None:
+        raise FileNotFoundError(
+            f"{name} not found in {output_dir}. Run main.py first to generate output tables."
+        )
+    if fmt == "csv":
+        return pd.read_csv(path, dtype=str, parse_dates=parse_dates or False)
+    if fmt == "parquet":
+        return pd.read_parquet(path)
+    return pd.read_feather(path)
@@ -0,0 +1,77 @@
+"""
+Embedded SQLite copy of the main.py output tables.
+
+main.py --sqlite loads every table it builds into one database file, with
+indexes on the ID and date columns, so downstream scripts can fetch just the
+rows they need (see store_queries.py) instead of reading whole CSV files.
+Dates are stored as ISO "YYYY-MM-DD" text, which sorts and compares
+correctly in SQL; the open-ended SAP date is 9999-12-31.
+"""
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from config import OUTPUT_DIR
+
+DEFAULT_DB_PATH = OUTPUT_DIR / "skill_data.sqlite"
+
+# Columns that get an index in every table that has them
+INDEXED_COLUMNS = [
+    "person_id",
+    "position_id",
+    "task_id",
+    "z_id",
+    "qualification_id",
+    "event_type_id",
+    "content_id",
+    "course_code",
+    "valid_from",
+    "valid_to",
+    "start_date",
+    "end_date",
+    "completed_date",
+]
+
+
+def _to_sql_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Dates -> ISO text, categoricals -> plain values.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime("%Y-%m-%d")
+        elif isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+    return df
+
+
+def missing_tables(names, db_path: Path = DEFAULT_DB_PATH) -> list:
+    """
+    Names (in the given order) that are not yet a table in the database.
+    A database file that does not exist lacks all of them.
+    """
+    if not Path(db_path).exists():
+        return list(names)
+    with sqlite3.connect(db_path) as conn:
+        present = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    return [name for name in names if name not in present]
+
+
+def write_sqlite(tables: dict, db_path: Path = DEFAULT_DB_PATH):
+    """
+    Write (or replace) the given tables {name: DataFrame} in the database,
+    creating indexes on INDEXED_COLUMNS. Tables not passed are left as they are.
+    """
+    with sqlite3.connect(db_path) as conn:
+        for name, df in tables.items():
+            _to_sql_frame(df).to_sql(name, conn, if_exists="replace", index=False)
+            for col in INDEXED_COLUMNS:
+                if col in df.columns:
+                    conn.execute(
+                        f'CREATE INDEX IF NOT EXISTS "ix_{name}_{col}" ON "{name}" ("{col}")'
+                    )
+        conn.execute("ANALYZE")
+    conn.close()
@@ -0,0 +1,162 @@
+"""
+As-of lookups on the validity-interval tables (valid_from / valid_to).
+
+person_position_history, position_tasks and person_qualification_history
+store one row per (key, value, interval). ValidityIndex is built once from
+such a table and answers "which values did key K have on date D" or
+"during [A, B]" without scanning the table: rows are grouped by key (dict
+lookup) and sorted by valid_from inside each group (binary search), so a
+query costs O(log n) plus the length of that key's own history. all_at()
+evaluates one date for every key at once with vectorised NumPy operations.
+
+Missing valid_from / valid_to are treated as open (-inf / +inf).
+"""
+import numpy as np
+import pandas as pd
+
+from table_io import read_table
+
+_DATE_UNIT = "datetime64[us]"
+MIN_DATE = np.datetime64("0001-01-01", "us")
+MAX_DATE = np.datetime64("9999-12-31", "us")
+
+
+def as_date_array(values, fill) -> np.ndarray:
+    """
+    Dates (datetime column or ISO text) -> datetime64[us] array, NaT -> fill.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        out = values.to_numpy().astype(_DATE_UNIT)
+    else:
+        # NumPy parses ISO dates beyond the pandas nanosecond range (9999-12-31)
+        text = pd.Series(values, dtype=object).astype(str).str.slice(0, 10)
+        text = text.where(pd.notna(values) & (text != ""), "NaT")
+        out = text.to_numpy(dtype=_DATE_UNIT)
+    out[np.isnat(out)] = fill
+    return out
+
+
+def as_date(value) -> np.datetime64:
+    """
+    Query date (str, date, Timestamp or datetime64) -> datetime64[us] day.
+    """
+    if isinstance(value, str):
+        return np.datetime64(value[:10], "us")
+    return np.datetime64(pd.Timestamp(value).date(), "us")
+
+
+class ValidityIndex:
+    """
+    Index over (key, value, valid_from, valid_to) rows.
+    """
+
+    def __init__(self, keys, values, starts, ends):
+        keys = pd.Series(keys).astype(str).to_numpy()
+        values = pd.Series(values).astype(str).to_numpy()
+        starts = as_date_array(pd.Series(starts), MIN_DATE)
+        ends = as_date_array(pd.Series(ends), MAX_DATE)
+
+        order = np.lexsort((starts, keys))
+        self.keys = keys[order]
+        self.values = values[order]
+        self.starts = starts[order]
+        self.ends = ends[order]
+
+        # key -> (first row, end row) of its group
+        self._groups = {}
+        if len(self.keys):
+            boundaries = np.flatnonzero(self.keys[1:] != self.keys[:-1]) + 1
+            firsts = np.concatenate(([0], boundaries))
+            lasts = np.concatenate((boundaries, [len(self.keys)]))
+            for first, last in zip(firsts, lasts):
+                self._groups[self.keys[first]] = (int(first), int(last))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, key: str, value: str,
+                   start: str = "valid_from", end: str = "valid_to"):
+        return cls(df[key], df[value], df[start], df[end])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _rows(self, key, lo_date, hi_date) -> np.ndarray:
+        """
+        Row numbers of key's intervals overlapping [lo_date, hi_date].
+        """
+        group = self._groups.get(str(key))
+        if group is None:
+            return np.empty(0, dtype=np.int64)
+        first, last = group
+        # Intervals starting after hi_date cannot overlap
+        stop = first + int(np.searchsorted(self.starts[first:last], hi_date, side="right"))
+        rows = np.arange(first, stop)
+        return rows[self.ends[first:stop] >= lo_date]
+
+    def at(self, key, date) -> list:
+        """
+        Values valid for key on date (valid_from <= date <= valid_to).
+        """
+        d = as_date(date)
+        return self.values[self._rows(key, d, d)].tolist()
+
+    def latest_at(self, key, date):
+        """
+        The value of the most recently started interval valid on date, or None.
+        Useful for histories with one value at a time (a person's position).
+        """
+        d = as_date(date)
+        rows = self._rows(key, d, d)
+        return self.values[rows[-1]] if len(rows) else None
+
+    def overlapping(self, key, start, end) -> pd.DataFrame:
+        """
+        Intervals of key overlapping [start, end], as a DataFrame.
+        """
+        rows = self._rows(key, as_date(start), as_date(end))
+        return self._frame(rows)
+
+    def all_at(self, date) -> pd.DataFrame:
+        """
+        All (key, value) pairs valid on date, for every key at once.
+        """
+        d = as_date(date)
+        rows = np.flatnonzero((self.starts <= d) & (self.ends >= d))
+        return self._frame(rows)
+
+    def _frame(self, rows) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "key": self.keys[rows],
+                "value": self.values[rows],
+                "valid_from": self.starts[rows],
+                "valid_to": self.ends[rows],
+            }
+        )
+
+
+def person_position_index(df: pd.DataFrame = None) -> ValidityIndex:
+    """
+    person_id -> position_id, from person_position_history (read from
+    OUTPUT_DIR if df is not given).
+    """
+    if df is None:
+        df = read_table("person_position_history")
+    return ValidityIndex.from_frame(df, "person_id", "position_id")
+
+
+def position_task_index(df: pd.DataFrame = None) -> ValidityIndex:
+    """
+    position_id -> task_id, from position_tasks.
+    """
+    if df is None:
+        df = read_table("position_tasks")
+    return ValidityIndex.from_frame(df, "position_id", "task_id")
+
+
+def person_qualification_index(df: pd.DataFrame = None) -> ValidityIndex:
+    """
+    person_id -> qualification_id, from person_qualification_history.
+    """
+    if df is None:
+        df = read_table("person_qualification_history")
+    return ValidityIndex.from_frame(df, "person_id", "qualification_id")